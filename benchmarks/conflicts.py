@@ -0,0 +1,65 @@
+"""
+Benchmark of the schedule conflict report on a schedule with many events.
+
+Compares the pairwise comparison clients had to do over the whole schedule with
+the single sorted sweep behind GET /schedules/{id}/conflicts. Rows are generated
+in memory and sorted the way EventsRepo.get_intervals_by_schedule_id returns them,
+so only the CPU cost of the report is measured.
+
+Usage: python -m benchmarks.conflicts [events]
+"""
+import random
+import sys
+import time
+from datetime import time as time_of_day
+
+from src.events.conflicts import find_conflicts
+from src.events.schemas import DayOfWeek
+
+DAYS = list(DayOfWeek)
+
+
+def generate(events: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    rows = []
+    for event_id in range(1, events + 1):
+        start = rng.randrange(6 * 60, 22 * 60)
+        end = min(start + rng.choice((15, 30, 45, 60, 90)), 24 * 60 - 1)
+        rows.append((event_id, rng.choice(DAYS),
+                     time_of_day(start // 60, start % 60), time_of_day(end // 60, end % 60)))
+
+    rows.sort(key=lambda row: (DAYS.index(row[1]), row[2], row[0]))
+    return rows
+
+
+def pairwise(rows: list) -> set:
+    conflicting = set()
+    for i, (id_a, day_a, start_a, end_a) in enumerate(rows):
+        for id_b, day_b, start_b, end_b in rows[i + 1:]:
+            if day_a == day_b and start_a < end_b and start_b < end_a:
+                conflicting.update((id_a, id_b))
+    return conflicting
+
+
+def measure(name: str, function, rows: list):
+    started = time.perf_counter()
+    result = function(rows)
+    elapsed = time.perf_counter() - started
+
+    print(f"{name:<22} {elapsed * 1e3:10.1f} ms")
+    return result
+
+
+def main(events: int):
+    rows = generate(events)
+    print(f"{events} events")
+
+    expected = measure("before (pairwise)", pairwise, rows)
+    groups = measure("after (sorted sweep)", find_conflicts, rows)
+
+    assert {event_id for group in groups for event_id in group.event_ids} == expected
+    print(f"{len(groups)} conflict groups, {len(expected)} conflicting events")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,211 @@
+"""
+Deterministic synthetic dataset for load tests: users, public and private schedules, events spread
+over the weekdays and follower subscriptions whose fan-out follows a power law.
+
+Rows are generated lazily as tuples in the column order of COLUMNS, with explicit ids, so the same
+config and seed always give the same rows whatever loads them. Every schedule gets its owner's OWNER
+subscription and non-overlapping events; followers only follow public schedules they don't own.
+"""
+import argparse
+import datetime
+import random
+from dataclasses import dataclass
+from itertools import accumulate, islice
+from typing import Iterator, Sequence
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.events.schemas import DayOfWeek
+from src.models import BaseModel
+from src.schedules.schemas import Schedule_Type
+from src.subscriptions.schemas import Subscription_Type
+
+# in foreign key order
+TABLES = ("user", "schedule", "event", "subscription")
+
+COLUMNS = {
+    "user": ("id", "email", "hashed_password", "is_active", "is_superuser", "is_verified", "name", "surname"),
+    "schedule": ("id", "name", "description", "owner_id", "schedule_type"),
+    "event": ("id", "schedule_id", "name", "description", "day_of_week", "start_time", "end_time"),
+    "subscription": ("id", "subscriber_id", "schedule_id", "subscription_type"),
+}
+
+PASSWORD = "benchmark"
+SUPERUSER_ID = 1
+
+# events start on the hour or ten past and last 45 minutes, one per hour at most, so they never overlap
+EVENT_HOURS = range(8, 20)
+EVENT_MINUTES = (0, 10)
+EVENT_DURATION = datetime.timedelta(minutes=45)
+
+SUBJECTS = ("Algebra", "Biology", "Chemistry", "Databases", "English", "French", "Geometry", "History",
+            "Literature", "Music", "Networks", "Physics", "Statistics", "Yoga")
+KINDS = ("lecture", "seminar", "lab", "practice", "workshop")
+
+
+@dataclass(frozen=True)
+class DatasetConfig:
+    users: int = 1_000
+    # mean number of schedules per user; some own none, a few own many
+    schedules_per_user: float = 2.0
+    public_ratio: float = 0.7
+    # at most this many events per weekday in a schedule
+    events_per_day: int = 3
+    # mean number of schedules a user follows
+    follows_per_user: float = 20.0
+    # exponent of the Zipf distribution of schedule popularity; higher concentrates followers on fewer schedules
+    fanout_exponent: float = 1.1
+    seed: int = 0
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--users", type=int, default=DatasetConfig.users)
+    parser.add_argument("--seed", type=int, default=DatasetConfig.seed)
+    parser.add_argument("--schedules-per-user", type=float, default=DatasetConfig.schedules_per_user)
+    parser.add_argument("--events-per-day", type=int, default=DatasetConfig.events_per_day)
+    parser.add_argument("--follows-per-user", type=float, default=DatasetConfig.follows_per_user)
+
+
+def config_from_arguments(arguments: argparse.Namespace) -> DatasetConfig:
+    return DatasetConfig(users=arguments.users, schedules_per_user=arguments.schedules_per_user,
+                         events_per_day=arguments.events_per_day, follows_per_user=arguments.follows_per_user,
+                         seed=arguments.seed)
+
+
+def quoted(table: str) -> str:
+    # "user" is a reserved word
+    return f'"{table}"'
+
+
+def draw_count(rng: random.Random, mean: float) -> int:
+    """A non-negative count with the given mean and a long tail (rounded exponential)."""
+    return int(rng.expovariate(1 / mean) + 0.5) if mean > 0 else 0
+
+
+class Dataset:
+    def __init__(self, config: DatasetConfig, hashed_password: str = ""):
+        self.config = config
+        self.hashed_password = hashed_password
+
+        # the schedule plan is small next to events and subscriptions and is needed by both, so it's kept
+        rng = self._random("schedules")
+        self.schedule_owners: list[int] = []
+        self.schedule_types: list[Schedule_Type] = []
+        for user_id in range(1, config.users + 1):
+            for _ in range(draw_count(rng, config.schedules_per_user)):
+                self.schedule_owners.append(user_id)
+                public = rng.random() < config.public_ratio
+                self.schedule_types.append(Schedule_Type.PUBLIC if public else Schedule_Type.PRIVATE)
+
+        # public schedules by popularity, most followed first; popularity isn't tied to ids
+        self.public_schedule_ids = [schedule_id for schedule_id in self.schedule_ids()
+                                    if self.schedule_types[schedule_id - 1] == Schedule_Type.PUBLIC]
+        self._random("popularity").shuffle(self.public_schedule_ids)
+        self._popularity = list(accumulate(1 / rank ** config.fanout_exponent
+                                           for rank in range(1, len(self.public_schedule_ids) + 1)))
+
+    def _random(self, stream: str) -> random.Random:
+        # one generator per table, so each table's rows don't depend on which others were generated
+        return random.Random(f"{self.config.seed}:{stream}")
+
+    def schedule_ids(self) -> range:
+        return range(1, len(self.schedule_owners) + 1)
+
+    def owner_of(self, schedule_id: int) -> int:
+        return self.schedule_owners[schedule_id - 1]
+
+    def popular_schedules(self, rng: random.Random, k: int = 1) -> list[int]:
+        """Public schedule ids drawn by popularity, with replacement."""
+        return rng.choices(self.public_schedule_ids, cum_weights=self._popularity, k=k)
+
+    def rows(self, table: str) -> Iterator[tuple]:
+        return getattr(self, f"{table}_rows")()
+
+    def user_rows(self) -> Iterator[tuple]:
+        rng = self._random("users")
+        for user_id in range(1, self.config.users + 1):
+            yield (user_id, f"user{user_id}@benchmark.example", self.hashed_password, True,
+                   user_id == SUPERUSER_ID, True, rng.choice(SUBJECTS), f"Surname{user_id}")
+
+    def schedule_rows(self) -> Iterator[tuple]:
+        for schedule_id in self.schedule_ids():
+            yield (schedule_id, f"Schedule {schedule_id}", "Generated for load tests",
+                   self.owner_of(schedule_id), self.schedule_types[schedule_id - 1])
+
+    def event_rows(self) -> Iterator[tuple]:
+        rng = self._random("events")
+        event_id = 0
+        for schedule_id in self.schedule_ids():
+            for day in DayOfWeek:
+                count = rng.randint(0, self.config.events_per_day)
+                for hour in sorted(rng.sample(EVENT_HOURS, count)):
+                    start = datetime.datetime.combine(datetime.date.min,
+                                                      datetime.time(hour, rng.choice(EVENT_MINUTES)))
+                    event_id += 1
+                    yield (event_id, schedule_id, f"{rng.choice(SUBJECTS)} {rng.choice(KINDS)}", "", day,
+                           start.time(), (start + EVENT_DURATION).time())
+
+    def subscription_rows(self) -> Iterator[tuple]:
+        rng = self._random("subscriptions")
+        subscription_id = 0
+        for schedule_id in self.schedule_ids():
+            subscription_id += 1
+            yield subscription_id, self.owner_of(schedule_id), schedule_id, Subscription_Type.OWNER
+
+        limit = len(self.public_schedule_ids)
+        for user_id in range(1, self.config.users + 1):
+            wanted = min(draw_count(rng, self.config.follows_per_user), limit)
+            followed = set()
+            # redraws of the same schedule are skipped; bounded, so users wanting most schedules end up with fewer
+            for schedule_id in self.popular_schedules(rng, k=wanted * 4):
+                if len(followed) == wanted:
+                    break
+                if schedule_id in followed or self.owner_of(schedule_id) == user_id:
+                    continue
+                followed.add(schedule_id)
+                subscription_id += 1
+                yield subscription_id, user_id, schedule_id, Subscription_Type.FOLLOWER
+
+
+def batches(rows: Iterator[tuple], size: int) -> Iterator[Sequence[tuple]]:
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+async def reset(engine: AsyncEngine):
+    """Empties the dataset's tables. Everything in them is lost."""
+    async with engine.begin() as connection:
+        await connection.execute(text(f"TRUNCATE {', '.join(map(quoted, TABLES))} RESTART IDENTITY CASCADE"))
+
+
+async def finish(engine: AsyncEngine):
+    """Moves the id sequences past the explicit ids and refreshes the planner statistics."""
+    async with engine.begin() as connection:
+        for table in TABLES:
+            await connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{quoted(table)}', 'id'), "
+                f"(SELECT coalesce(max(id), 0) + 1 FROM {quoted(table)}), false)"
+            ))
+        await connection.execute(text(f"ANALYZE {', '.join(map(quoted, TABLES))}"))
+
+
+async def load(engine: AsyncEngine, dataset: Dataset, batch_size: int = 1_000) -> dict[str, int]:
+    """
+    Replaces the contents of the tables with the dataset through batched multi-row INSERTs.
+    The schedule counters are kept by their triggers. Returns the number of rows per table.
+    """
+    await reset(engine)
+
+    counts = {}
+    for table in TABLES:
+        columns = COLUMNS[table]
+        insert_smth = insert(BaseModel.metadata.tables[table])
+        counts[table] = 0
+        for batch in batches(dataset.rows(table), batch_size):
+            async with engine.begin() as connection:
+                await connection.execute(insert_smth, [dict(zip(columns, row)) for row in batch])
+            counts[table] += len(batch)
+
+    await finish(engine)
+    return counts
@@ -0,0 +1,243 @@
+"""
+Load test of the API against a local Postgres.
+
+Drives the FastAPI app of src.main in process, through httpx.AsyncClient workers on an ASGI transport,
+with a weighted mix of read endpoints over the seeded dataset of benchmarks.dataset. Popular schedules
+are requested more often, following the same power law as their followers. Reports, per endpoint and
+in total, p50/p95/p99 latency, throughput and the database queries per request, as JSON for
+run-to-run comparison.
+
+The database comes from the usual DB_* settings and must be at the latest migration. --reset replaces
+the contents of the user, schedule, event and subscription tables with the dataset, so point DB_NAME
+at a scratch database. Without --reset the tables must hold the dataset of the same options (e.g. from
+an earlier --reset run, or from python -m benchmarks.seed for large datasets). With more workers than
+DB_POOL_SIZE + DB_MAX_OVERFLOW, requests queue for connections.
+
+Usage: python -m benchmarks.load [--reset] [--users N] [--seed N] [--schedules-per-user X] [--events-per-day N]
+                                 [--follows-per-user X] [--concurrency N] [--duration SECONDS]
+                                 [--warmup SECONDS] [--output FILE]
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, asdict, field
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+import httpx
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import event
+
+from benchmarks.dataset import Dataset, PASSWORD, SUPERUSER_ID, add_config_arguments, config_from_arguments, load
+from src.auth.config import get_jwt_strategy
+from src.main import app
+from src.setup import engine, replica_engines
+
+# the query counter of the request the current task is making
+current_queries: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("current_queries", default=None)
+
+
+def count_query(*_):
+    counter = current_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+for counted_engine in (engine, *replica_engines):
+    event.listen(counted_engine.sync_engine, "before_cursor_execute", count_query)
+
+
+@dataclass
+class Endpoint:
+    name: str
+    weight: int
+    # (rng, dataset) -> (path, id of the user making the request)
+    request: Callable[[random.Random, Dataset], tuple[str, int]]
+
+
+def any_user(rng: random.Random, dataset: Dataset) -> int:
+    return rng.randint(1, dataset.config.users)
+
+
+def popular_schedule(view: str = "") -> Callable[[random.Random, Dataset], tuple[str, int]]:
+    def request(rng: random.Random, dataset: Dataset) -> tuple[str, int]:
+        return f"/schedules/{dataset.popular_schedules(rng)[0]}{view}", any_user(rng, dataset)
+    return request
+
+
+def own_schedules(rng: random.Random, dataset: Dataset) -> tuple[str, int]:
+    return "/me/schedules", dataset.owner_of(rng.choice(dataset.schedule_ids()))
+
+
+def schedule_subscribers(rng: random.Random, dataset: Dataset) -> tuple[str, int]:
+    # only the owner (or a superuser) may list them
+    schedule_id = dataset.popular_schedules(rng)[0]
+    return f"/schedules/{schedule_id}/subscribers?size=20", dataset.owner_of(schedule_id)
+
+
+def superuser_list(path: str) -> Callable[[random.Random, Dataset], tuple[str, int]]:
+    def request(rng: random.Random, dataset: Dataset) -> tuple[str, int]:
+        return f"{path}&page={rng.randint(0, 50)}&size=50", SUPERUSER_ID
+    return request
+
+
+ENDPOINTS = (
+    Endpoint("GET /schedules/{id}", 20, popular_schedule()),
+    Endpoint("GET /schedules/{id}/events", 15, popular_schedule("/events?size=20")),
+    Endpoint("GET /schedules/{id}/week", 15, popular_schedule("/week")),
+    Endpoint("GET /schedules/{id}/calendar.ics", 5, popular_schedule("/calendar.ics")),
+    Endpoint("GET /me/agenda", 15, lambda rng, dataset: ("/me/agenda?size=20", any_user(rng, dataset))),
+    Endpoint("GET /me/subscriptions/as_follower", 10,
+             lambda rng, dataset: ("/me/subscriptions/as_follower?size=20", any_user(rng, dataset))),
+    Endpoint("GET /me/schedules", 5, own_schedules),
+    Endpoint("GET /schedules/{id}/subscribers", 5, schedule_subscribers),
+    Endpoint("GET /subscriptions/?fields=id,schedule.name", 5,
+             superuser_list("/subscriptions/?fields=id,schedule.name&exact=false")),
+    Endpoint("GET /users/", 5, superuser_list("/users/?exact=false")),
+)
+
+
+@dataclass
+class Samples:
+    latencies: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+    errors: int = 0
+
+    def add(self, other: "Samples"):
+        self.latencies += other.latencies
+        self.queries += other.queries
+        self.errors += other.errors
+
+    def report(self, duration: float) -> dict:
+        if not self.latencies:
+            return {"requests": 0, "errors": self.errors}
+
+        milliseconds = sorted(latency * 1000 for latency in self.latencies)
+        # quantiles() needs two data points; a single request is every percentile at once
+        percentiles = (statistics.quantiles(milliseconds, n=100, method="inclusive") if len(milliseconds) > 1
+                       else milliseconds * 99)
+        return {
+            "requests": len(milliseconds),
+            "errors": self.errors,
+            "throughput_rps": round(len(milliseconds) / duration, 1),
+            "latency_ms": {
+                "p50": round(percentiles[49], 2),
+                "p95": round(percentiles[94], 2),
+                "p99": round(percentiles[98], 2),
+                "mean": round(statistics.fmean(milliseconds), 2),
+                "max": round(milliseconds[-1], 2),
+            },
+            "queries_per_request": round(statistics.fmean(self.queries), 2),
+        }
+
+
+class Tokens:
+    """Bearer tokens of dataset users, signed on first use like the login endpoint would."""
+
+    def __init__(self):
+        self.headers: dict[int, dict] = {}
+
+    async def for_user(self, user_id: int) -> dict:
+        if user_id not in self.headers:
+            token = await get_jwt_strategy().write_token(SimpleNamespace(id=user_id))
+            self.headers[user_id] = {"Authorization": f"Bearer {token}"}
+        return self.headers[user_id]
+
+
+async def worker(index: int, dataset: Dataset, tokens: Tokens, until: float) -> dict[str, Samples]:
+    rng = random.Random(f"{dataset.config.seed}:worker:{index}")
+    samples = defaultdict(Samples)
+    weights = [endpoint.weight for endpoint in ENDPOINTS]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        while time.perf_counter() < until:
+            endpoint = rng.choices(ENDPOINTS, weights=weights)[0]
+            path, user_id = endpoint.request(rng, dataset)
+            headers = await tokens.for_user(user_id)
+
+            counter = [0]
+            current_queries.set(counter)
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            elapsed = time.perf_counter() - started
+            current_queries.set(None)
+
+            sample = samples[endpoint.name]
+            if response.status_code >= 400:
+                sample.errors += 1
+            else:
+                sample.latencies.append(elapsed)
+                sample.queries.append(counter[0])
+    return samples
+
+
+async def run(dataset: Dataset, concurrency: int, duration: float) -> dict[str, Samples]:
+    tokens = Tokens()
+    until = time.perf_counter() + duration
+    results = await asyncio.gather(*(worker(index, dataset, tokens, until) for index in range(concurrency)))
+
+    merged = defaultdict(Samples)
+    for result in results:
+        for name, samples in result.items():
+            merged[name].add(samples)
+    return merged
+
+
+async def main(arguments: argparse.Namespace):
+    config = config_from_arguments(arguments)
+    dataset = Dataset(config, hashed_password=PasswordHelper().hash(PASSWORD))
+
+    rows = None
+    if arguments.reset:
+        print("loading the dataset...", file=sys.stderr)
+        rows = await load(engine, dataset)
+
+    if arguments.warmup > 0:
+        print(f"warming up for {arguments.warmup:g}s...", file=sys.stderr)
+        await run(dataset, arguments.concurrency, arguments.warmup)
+
+    print(f"measuring for {arguments.duration:g}s with {arguments.concurrency} workers...", file=sys.stderr)
+    started = time.perf_counter()
+    samples = await run(dataset, arguments.concurrency, arguments.duration)
+    duration = time.perf_counter() - started
+
+    total = Samples()
+    for endpoint_samples in samples.values():
+        total.add(endpoint_samples)
+
+    report = {
+        "dataset": asdict(config),
+        "rows": rows,
+        "concurrency": arguments.concurrency,
+        "duration_s": round(duration, 2),
+        "total": total.report(duration),
+        "endpoints": {endpoint.name: samples[endpoint.name].report(duration) for endpoint in ENDPOINTS},
+    }
+
+    output = json.dumps(report, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--reset", action="store_true", help="replace the tables' contents with the dataset first")
+    add_config_arguments(parser)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="seconds to measure for")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of unmeasured requests first")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_arguments()))
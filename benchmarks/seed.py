@@ -0,0 +1,123 @@
+"""
+Bulk seeding of a local Postgres with the dataset of benchmarks.dataset through COPY, for
+reproducing issues at production scale (tens of millions of event and subscription rows).
+
+Rows are streamed with asyncpg's copy_records_to_table in batches, in foreign key order, inside one
+transaction. The schedule counter triggers are disabled for the load and the counters are computed
+once at the end, instead of on every batch; the OWNER subscriptions come from the dataset itself.
+The same options and seed always give the same rows, so a seeded database can be benchmarked with
+python -m benchmarks.load without --reset and the same options.
+
+The database comes from the usual DB_* settings and must be at the latest migration. The contents of
+the user, schedule, event and subscription tables are replaced, so point DB_NAME at a scratch database.
+About 500 000 users with the default densities give over 20M rows.
+
+Usage: python -m benchmarks.seed [--users N] [--seed N] [--schedules-per-user X] [--events-per-day N]
+                                 [--follows-per-user X] [--batch-size N]
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from fastapi_users.password import PasswordHelper
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks.dataset import (COLUMNS, PASSWORD, TABLES, Dataset, add_config_arguments, batches,
+                                config_from_arguments, finish, quoted)
+from src.setup import engine
+
+# enum columns are written by name, which is what the Postgres enum types hold
+ENUM_COLUMNS = {
+    "schedule": ("schedule_type",),
+    "event": ("day_of_week",),
+    "subscription": ("subscription_type",),
+}
+
+# (counted table, counter column on schedule), as kept by the triggers of the counters migration
+COUNTERS = (
+    ("subscription", "subscriber_count"),
+    ("event", "event_count"),
+)
+
+
+def copy_rows(dataset: Dataset, table: str):
+    rows = dataset.rows(table)
+    positions = [COLUMNS[table].index(column) for column in ENUM_COLUMNS.get(table, ())]
+    if not positions:
+        return rows
+
+    def by_name():
+        for row in rows:
+            row = list(row)
+            for position in positions:
+                row[position] = row[position].name
+            yield tuple(row)
+    return by_name()
+
+
+def counter_triggers(operation: str) -> list[str]:
+    return [
+        f"ALTER TABLE {table} {operation} TRIGGER {table}_{column}_on_{action}"
+        for table, column in COUNTERS for action in ("insert", "delete")
+    ]
+
+
+async def seed(engine: AsyncEngine, dataset: Dataset, batch_size: int = 100_000) -> dict[str, int]:
+    """
+    Replaces the contents of the tables with the dataset through COPY and sets the schedule counters.
+    Returns the number of rows per table.
+    """
+    counts = {}
+    async with engine.connect() as connection:
+        # COPY isn't exposed by SQLAlchemy; the pooled asyncpg connection is used directly
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+
+        # all or nothing: a failed load leaves the tables (and their triggers) as they were
+        async with driver_connection.transaction():
+            await driver_connection.execute(f"TRUNCATE {', '.join(map(quoted, TABLES))} RESTART IDENTITY CASCADE")
+            for statement in counter_triggers("DISABLE"):
+                await driver_connection.execute(statement)
+
+            for table in TABLES:
+                started = time.perf_counter()
+                counts[table] = 0
+                for batch in batches(copy_rows(dataset, table), batch_size):
+                    await driver_connection.copy_records_to_table(table, records=batch, columns=COLUMNS[table])
+                    counts[table] += len(batch)
+                print(f"{table}: {counts[table]} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+            for counted_table, column in COUNTERS:
+                await driver_connection.execute(
+                    f"""
+                    UPDATE schedule
+                    SET {column} = counted.n
+                    FROM (SELECT schedule_id, count(*) AS n FROM {counted_table} GROUP BY schedule_id) AS counted
+                    WHERE schedule.id = counted.schedule_id
+                    """
+                )
+            for statement in counter_triggers("ENABLE"):
+                await driver_connection.execute(statement)
+
+    await finish(engine)
+    return counts
+
+
+async def main(arguments: argparse.Namespace):
+    dataset = Dataset(config_from_arguments(arguments), hashed_password=PasswordHelper().hash(PASSWORD))
+
+    started = time.perf_counter()
+    counts = await seed(engine, dataset, arguments.batch_size)
+    print(f"{sum(counts.values())} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.seed", description=__doc__.split("\n\n")[0])
+    add_config_arguments(parser)
+    parser.add_argument("--batch-size", type=int, default=100_000, help="rows per COPY")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_arguments()))
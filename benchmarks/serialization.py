@@ -0,0 +1,96 @@
+"""
+Benchmark of rendering 100-item pages of SubscriptionRead.
+
+Compares FastAPI's response_model path (validation of the returned dict of ORM objects,
+jsonable_encoder, then the stdlib or orjson encoder) with the pre-built responses the routes
+now return (the ORM attributes read by the scheme's cached dumper, without validation, and encoded by orjson).
+The schema is the same for every path, so only the rendering differs; the bodies must come out identical.
+ORM objects are built in memory, so only CPU cost is measured.
+
+Usage: python -m benchmarks.serialization [iterations]
+"""
+import asyncio
+import datetime
+import sys
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.events.models import Event  # noqa: F401 (registers the mapper Schedule refers to)
+from src.repositories import Page
+from src.responses import paginated_response, paginated_response_content
+from src.schedules.models import Schedule
+from src.schedules.schemas import Schedule_Type
+from src.schemas import PaginatedResponseScheme
+from src.subscriptions.models import Subscription
+from src.subscriptions.schemas import SubscriptionRead, Subscription_Type
+from src.users.models import User
+
+PAGE_SIZE = 100
+
+
+def build_page() -> Page:
+    now = datetime.datetime(2026, 10, 18, 12, 0)
+    subscriber = User(id=1, email="user@example.com", hashed_password="x", name="Ada", surname="Lovelace",
+                      is_active=True, is_superuser=False, is_verified=True)
+
+    items = []
+    for i in range(PAGE_SIZE):
+        schedule = Schedule(id=i, name=f"Schedule {i}", description="Weekly lectures", owner_id=2,
+                            schedule_type=Schedule_Type.PUBLIC, subscriber_count=12, event_count=5,
+                            created_at=now, updated_at=now)
+        items.append(Subscription(id=i, subscriber_id=1, schedule_id=i, subscription_type=Subscription_Type.FOLLOWER,
+                                  subscriber=subscriber, schedule=schedule, created_at=now, updated_at=now))
+    return Page(items=items, next_cursor="cursor", count=10 * PAGE_SIZE)
+
+
+async def measure(render, iterations: int) -> tuple[float, bytes]:
+    """Microseconds per page, and the body rendered."""
+    body = await render()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await render()
+    elapsed = time.perf_counter() - started
+
+    return elapsed / iterations * 1e6, body
+
+
+def response_model_path(scheme, page: Page, response_class):
+    field = create_response_field(name="Response_get_subscriptions", type_=PaginatedResponseScheme[scheme])
+
+    async def render():
+        content = await serialize_response(field=field, response_content=paginated_response_content(page, 0, PAGE_SIZE))
+        return response_class(content).body
+    return render
+
+
+def prebuilt_path(scheme, page: Page):
+    async def render():
+        return paginated_response(scheme, page, 0, PAGE_SIZE).body
+    return render
+
+
+PATHS = {
+    "response_model + json": lambda scheme, page: response_model_path(scheme, page, JSONResponse),
+    "response_model + orjson": lambda scheme, page: response_model_path(scheme, page, ORJSONResponse),
+    "cached dumper + orjson": prebuilt_path,
+}
+
+
+async def main(iterations: int):
+    page = build_page()
+    bodies = set()
+
+    for path_name, path in PATHS.items():
+        elapsed, body = await measure(path(SubscriptionRead, page), iterations)
+        bodies.add(body)
+        print(f"{path_name:<26}{elapsed:10.1f} us/page")
+
+    assert len(bodies) == 1
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000))
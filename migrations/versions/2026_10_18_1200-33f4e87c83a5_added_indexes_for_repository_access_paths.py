@@ -0,0 +1,40 @@
+"""added indexes for repository access paths
+
+Revision ID: 33f4e87c83a5
+Revises: 46a2feb6a011
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '33f4e87c83a5'
+down_revision: Union[str, None] = '46a2feb6a011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_event_schedule_id_day_of_week_start_time', 'event', ['schedule_id', 'day_of_week', 'start_time', 'id']),
+    ('ix_event_day_of_week_start_time', 'event', ['day_of_week', 'start_time', 'id']),
+    ('ix_schedule_owner_id', 'schedule', ['owner_id', 'id']),
+    ('ix_schedule_schedule_type', 'schedule', ['schedule_type']),
+    ('ix_subscription_subscriber_id_subscription_type', 'subscription', ['subscriber_id', 'subscription_type', 'id']),
+    ('ix_subscription_schedule_id', 'subscription', ['schedule_id', 'id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
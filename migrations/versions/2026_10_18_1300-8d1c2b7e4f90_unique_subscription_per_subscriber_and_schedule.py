@@ -0,0 +1,44 @@
+"""unique subscription per subscriber and schedule
+
+Revision ID: 8d1c2b7e4f90
+Revises: 33f4e87c83a5
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d1c2b7e4f90'
+down_revision: Union[str, None] = '33f4e87c83a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # keep one row per (subscriber, schedule): the owner subscription if there is one, otherwise the oldest
+    op.execute(
+        """
+        DELETE FROM subscription
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id,
+                       row_number() OVER (
+                           PARTITION BY subscriber_id, schedule_id
+                           ORDER BY subscription_type = 'OWNER' DESC, id
+                       ) AS position
+                FROM subscription
+            ) AS ranked
+            WHERE ranked.position > 1
+        )
+        """
+    )
+    op.create_unique_constraint('uq_subscription_subscriber_id_schedule_id', 'subscription',
+                                ['subscriber_id', 'schedule_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_subscription_subscriber_id_schedule_id', 'subscription', type_='unique')
@@ -0,0 +1,84 @@
+"""schedule subscriber and event counters
+
+Revision ID: 4b7e9a1c3d52
+Revises: 8d1c2b7e4f90
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e9a1c3d52'
+down_revision: Union[str, None] = '8d1c2b7e4f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (counted table, counter column on schedule); rows never move between schedules,
+# so inserts and deletes are all that change the counts
+COUNTERS = (
+    ('subscription', 'subscriber_count'),
+    ('event', 'event_count'),
+)
+
+
+def upgrade() -> None:
+    op.add_column('schedule', sa.Column('subscriber_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('schedule', sa.Column('event_count', sa.Integer(), server_default='0', nullable=False))
+
+    for table, column in COUNTERS:
+        for operation, rows, sign in (('insert', 'new_rows', '+'), ('delete', 'old_rows', '-')):
+            # statement level, so a multi-row insert or a cascading delete updates each schedule once.
+            # Schedule rows are locked in id order first: two statements touching the same schedules
+            # can't deadlock, and NO KEY UPDATE doesn't conflict with the foreign key checks of the rows
+            op.execute(
+                f"""
+                CREATE FUNCTION {table}_{column}_on_{operation}() RETURNS trigger
+                LANGUAGE plpgsql AS $$
+                BEGIN
+                    PERFORM 1 FROM schedule
+                    WHERE id IN (SELECT schedule_id FROM {rows})
+                    ORDER BY id
+                    FOR NO KEY UPDATE;
+
+                    UPDATE schedule
+                    SET {column} = {column} {sign} delta.n
+                    FROM (SELECT schedule_id, count(*) AS n FROM {rows} GROUP BY schedule_id) AS delta
+                    WHERE schedule.id = delta.schedule_id;
+
+                    RETURN NULL;
+                END
+                $$
+                """
+            )
+            op.execute(
+                f"""
+                CREATE TRIGGER {table}_{column}_on_{operation}
+                AFTER {operation.upper()} ON {table}
+                REFERENCING {'NEW' if rows == 'new_rows' else 'OLD'} TABLE AS {rows}
+                FOR EACH STATEMENT EXECUTE FUNCTION {table}_{column}_on_{operation}()
+                """
+            )
+
+        # after the triggers, in the same transaction: nothing written meanwhile is missed
+        op.execute(
+            f"""
+            UPDATE schedule
+            SET {column} = counted.n
+            FROM (SELECT schedule_id, count(*) AS n FROM {table} GROUP BY schedule_id) AS counted
+            WHERE schedule.id = counted.schedule_id
+            """
+        )
+
+
+def downgrade() -> None:
+    for table, column in COUNTERS:
+        for operation in ('insert', 'delete'):
+            op.execute(f"DROP TRIGGER {table}_{column}_on_{operation} ON {table}")
+            op.execute(f"DROP FUNCTION {table}_{column}_on_{operation}()")
+
+    op.drop_column('schedule', 'event_count')
+    op.drop_column('schedule', 'subscriber_count')
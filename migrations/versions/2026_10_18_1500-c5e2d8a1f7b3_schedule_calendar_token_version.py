@@ -0,0 +1,26 @@
+"""schedule calendar token version
+
+Revision ID: c5e2d8a1f7b3
+Revises: 4b7e9a1c3d52
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2d8a1f7b3'
+down_revision: Union[str, None] = '4b7e9a1c3d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('schedule', sa.Column('calendar_token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('schedule', 'calendar_token_version')
@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+
+from src.cache import TTLCache
+
+PRINCIPAL_CACHE_SIZE = 10_000
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+
+VERIFIED_TOKEN_CACHE_SIZE = 10_000
+VERIFIED_TOKEN_CACHE_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class Principal:
+    """A slim snapshot of the authenticated user, enough for the authenticator and permission checks."""
+
+    id: int
+    is_active: bool
+    is_superuser: bool
+    is_verified: bool
+
+    @staticmethod
+    def from_user(user) -> "Principal":
+        return Principal(
+            id=user.id,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            is_verified=user.is_verified,
+        )
+
+
+principal_cache: TTLCache[int, Principal] = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+
+# claims of tokens whose signature has already been verified, keyed by the token's SHA-256 digest
+verified_token_cache: TTLCache[bytes, dict] = TTLCache(maxsize=VERIFIED_TOKEN_CACHE_SIZE,
+                                                       ttl=VERIFIED_TOKEN_CACHE_TTL_SECONDS)
+
+
+def invalidate_principal(user_id: int):
+    principal_cache.invalidate(user_id)
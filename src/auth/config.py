@@ -1,22 +1,26 @@
 import os
+from functools import lru_cache
 
 from fastapi_users import FastAPIUsers
 from fastapi_users.authentication import BearerTransport, AuthenticationBackend, JWTStrategy
 
 from src.auth.manager import get_user_manager
+from src.auth.strategy import CachedJWTStrategy
 from src.users.models import User
 
 bearer_transport = BearerTransport(tokenUrl="auth/jwt/login")
 
 
+@lru_cache(maxsize=None)
 def get_jwt_strategy() -> JWTStrategy:
+    # built once per process; the strategy is stateless apart from its verified-token cache
     from dotenv import load_dotenv
 
     load_dotenv()
 
     secret = os.environ.get("SECRET_KEY")
 
-    return JWTStrategy(secret=secret, lifetime_seconds=3600)
+    return CachedJWTStrategy(secret=secret, lifetime_seconds=3600)
 
 
 auth_backend = AuthenticationBackend(
@@ -1,8 +1,9 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, Request
 from fastapi_users import BaseUserManager, IntegerIDMixin
 
+from src.auth.cache import invalidate_principal
 from src.users.models import User
 from src.setup import get_db
 
@@ -26,6 +27,14 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     ):
         print(f"Verification requested for user {user.id}. Verification token: {token}")
 
+    async def on_after_update(
+        self, user: User, update_dict: Dict[str, Any], request: Optional[Request] = None
+    ):
+        invalidate_principal(user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        invalidate_principal(user.id)
+
 
 async def get_user_manager(user_db=Depends(get_db)):
     yield UserManager(user_db)
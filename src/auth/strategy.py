@@ -0,0 +1,60 @@
+import hashlib
+import time
+from typing import Optional
+
+import jwt
+from fastapi_users import exceptions
+from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt
+from fastapi_users.manager import BaseUserManager
+
+from src.auth.cache import Principal, principal_cache, verified_token_cache
+
+
+class CachedJWTStrategy(JWTStrategy):
+    """
+    JWT strategy that remembers verified token claims until the token expires and resolves
+    the token's subject through the principal cache, so neither the signature check nor
+    the user row lookup is repeated on every request.
+    """
+
+    def verify_token(self, token: str) -> dict:
+        digest = hashlib.sha256(token.encode()).digest()
+
+        data = verified_token_cache.get(digest)
+        if data is None:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+            )
+            expires_at = data.get("exp")
+            verified_token_cache.set(digest, data, ttl=expires_at - time.time() if expires_at else None)
+        return data
+
+    async def read_token(self, token: Optional[str], user_manager: BaseUserManager) -> Optional[Principal]:
+        if token is None:
+            return None
+
+        try:
+            data = self.verify_token(token)
+            user_id = data.get("sub")
+            if user_id is None:
+                return None
+            parsed_id = user_manager.parse_id(user_id)
+        except (jwt.PyJWTError, exceptions.InvalidID):
+            return None
+
+        principal = principal_cache.get(parsed_id)
+        if principal is not None:
+            return principal
+
+        try:
+            user = await user_manager.get(parsed_id)
+        except exceptions.UserNotExists:
+            return None
+
+        principal = Principal.from_user(user)
+
+        # the snapshot must not outlive the token it was resolved for
+        expires_at = data.get("exp")
+        principal_cache.set(parsed_id, principal, ttl=expires_at - time.time() if expires_at else None)
+        return principal
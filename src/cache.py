@@ -0,0 +1,157 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+@dataclass
+class CacheStatistics:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class TTLCache(Generic[K, V]):
+    """
+    In-process LRU cache where every entry also expires after a time-to-live.
+    Entries are not shared between worker processes.
+
+    Attributes
+    ----------
+    maxsize : int
+        The maximum number of entries; the least recently used one is evicted first.
+    ttl : float
+        The default time-to-live of an entry in seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.statistics = CacheStatistics()
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.statistics.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.statistics.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.statistics.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.statistics.evictions += 1
+
+    def invalidate(self, key: K):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of serialised responses bounded by the total size of their bodies.
+    Keys are tuples whose first element names a group (e.g. a schedule id), so every
+    entry derived from the same object can be invalidated at once.
+
+    Attributes
+    ----------
+    max_bytes : int
+        The memory budget for cached bodies; least recently used entries are evicted first.
+    ttl : float
+        The time-to-live of an entry in seconds.
+    """
+
+    # rough per-entry bookkeeping overhead (key, headers, validators)
+    ENTRY_OVERHEAD = 512
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        # bumped by every invalidation; lets a slow fill detect that its data may already be stale
+        self.invalidations = 0
+        self.statistics = CacheStatistics()
+        self._entries: OrderedDict[tuple, tuple[float, int, Any]] = OrderedDict()
+        self._groups: dict[Hashable, set[tuple]] = {}
+
+    def get(self, key: tuple) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.statistics.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.statistics.hits += 1
+        return entry[2]
+
+    def set(self, key: tuple, value: Any, size: int, generation: Optional[int] = None):
+        """
+        Stores a value of the given size in bytes. With generation (the value of invalidations read before
+        the data was loaded) nothing is stored if any invalidation happened in the meantime.
+        """
+        size += self.ENTRY_OVERHEAD
+        if size > self.max_bytes or (generation is not None and generation != self.invalidations):
+            return
+
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._groups.setdefault(key[0], set()).add(key)
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.statistics.evictions += 1
+
+    def invalidate_group(self, group: Hashable):
+        self.invalidations += 1
+        for key in list(self._groups.get(group, ())):
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._groups.clear()
+        self.current_bytes = 0
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        self.current_bytes -= entry[1]
+        group = self._groups.get(key[0])
+        if group is not None:
+            group.discard(key)
+            if not group:
+                del self._groups[key[0]]
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,81 @@
+import datetime
+import hashlib
+from dataclasses import dataclass
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+PUBLIC_CACHE_CONTROL = "public, max-age=60"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag, as RFC 9110 requires for GET."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+@dataclass
+class Validators:
+    """
+    Validators of a response computed from row metadata (updated_at, counts) instead of the body,
+    so a conditional request can be answered before the payload is loaded and serialised.
+
+    Attributes
+    ----------
+    etag : str
+        A weak ETag derived from the state the response depends on.
+    last_modified : Optional[datetime.datetime]
+        The newest updated_at (UTC) of the rows in the response. Only set for single resources:
+        a max(updated_at) can't see a deleted row, so collections rely on the ETag alone.
+    """
+
+    etag: str
+    last_modified: Optional[datetime.datetime] = None
+
+    @staticmethod
+    def from_state(*state, last_modified: Optional[datetime.datetime] = None) -> "Validators":
+        digest = hashlib.sha256(repr(state).encode()).hexdigest()[:32]
+        return Validators(etag=f'W/"{digest}"', last_modified=last_modified)
+
+    def headers(self, cache_control: str) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": cache_control}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(_as_utc(self.last_modified), usegmt=True)
+        return headers
+
+    def matches(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, self.etag)
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        # HTTP dates have second precision
+        return _as_utc(self.last_modified).replace(microsecond=0) <= since
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    # timestamps are stored as naive UTC
+    return value if value.tzinfo else value.replace(tzinfo=datetime.timezone.utc)
@@ -1,5 +1,5 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from sqlalchemy.engine.url import URL
 
@@ -24,6 +24,25 @@ class DbConfig:
         The port where the database server is listening.
     echo: bool
         Whether to echo SQL statements to the console.
+    pool_size : int
+        The number of connections kept open in the pool.
+    max_overflow : int
+        The number of connections that may be opened above pool_size under load.
+    pool_timeout : float
+        Seconds to wait for a free connection before giving up.
+    pool_recycle : int
+        Seconds after which a connection is replaced; -1 disables recycling.
+    pool_pre_ping : bool
+        Whether to test connections for liveness on checkout.
+    statement_cache_size : int
+        The size of asyncpg's own prepared statement cache; 0 disables it (required behind pgbouncer
+        in transaction mode).
+    prepared_statement_cache_size : int
+        The size of SQLAlchemy's asyncpg prepared statement cache; 0 disables it.
+    replica_hosts : list[str]
+        Read replicas as "host" or "host:port"; the primary's port is used when omitted.
+    replica_balancing : str
+        How read sessions pick a replica: "round_robin" or "least_busy".
     """
 
     host: str
@@ -32,6 +51,15 @@ class DbConfig:
     user: str
     password: str
     echo: bool
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = -1
+    pool_pre_ping: bool = True
+    statement_cache_size: int = 100
+    prepared_statement_cache_size: int = 100
+    replica_hosts: list[str] = field(default_factory=list)
+    replica_balancing: str = "round_robin"
 
     # For SQLAlchemy
     def construct_sqlalchemy_url(self, driver="asyncpg", host=None, port=None) -> str:
@@ -53,6 +81,36 @@ class DbConfig:
         )
         return uri.render_as_string(hide_password=False)
 
+    def construct_replica_urls(self, driver="asyncpg") -> list[str]:
+        """
+        Constructs and returns a SQLAlchemy URL for every configured read replica.
+        """
+
+        urls = []
+        for replica in self.replica_hosts:
+            host, _, port = replica.partition(":")
+            urls.append(self.construct_sqlalchemy_url(driver=driver, host=host, port=port or None))
+        return urls
+
+    def construct_engine_options(self) -> dict:
+        """
+        Constructs and returns the keyword arguments for create_async_engine: pool sizing and
+        the asyncpg statement cache settings.
+        """
+
+        return dict(
+            echo=self.echo,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_recycle=self.pool_recycle,
+            pool_pre_ping=self.pool_pre_ping,
+            connect_args=dict(
+                statement_cache_size=self.statement_cache_size,
+                prepared_statement_cache_size=self.prepared_statement_cache_size,
+            ),
+        )
+
     @staticmethod
     def from_env(echo: bool = False) -> "DbConfig":
         """
@@ -68,5 +126,14 @@ class DbConfig:
         name = os.environ.get("DB_NAME")
         port = os.environ.get("DB_PORT", 5432)
         return DbConfig(
-            host=host, password=password, user=user, name=name, port=port, echo=echo
+            host=host, password=password, user=user, name=name, port=port, echo=echo,
+            pool_size=int(os.environ.get("DB_POOL_SIZE", 5)),
+            max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+            pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", -1)),
+            pool_pre_ping=os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+            statement_cache_size=int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 100)),
+            prepared_statement_cache_size=int(os.environ.get("DB_PREPARED_STATEMENT_CACHE_SIZE", 100)),
+            replica_hosts=[host.strip() for host in os.environ.get("DB_REPLICA_HOSTS", "").split(",") if host.strip()],
+            replica_balancing=os.environ.get("DB_REPLICA_BALANCING", "round_robin"),
         )
@@ -1,11 +1,30 @@
+from typing import Optional
+
 from fastapi import Query
 from pydantic import BaseModel
 from fastapi import Depends
 
+from src.fields import FieldSelection, FIELDS_MAX_LENGTH, parse_fields
+
 class PaginationParams(BaseModel):
     page: int = Query(ge=0, default=0)
     size: int = Query(ge=1, le=100, default=10)
+    # opaque keyset cursor taken from a previous response's next_cursor; when set, page is ignored
+    cursor: Optional[str] = Query(default=None)
 
 
 async def get_pagination_params(pagination_params: PaginationParams = Depends()):
     return pagination_params
+
+
+async def get_exact(exact: bool = Query(default=True,
+                                        description="Count the total exactly; false accepts the planner's "
+                                                    "estimate on large tables")) -> bool:
+    return exact
+
+
+async def get_fields(fields: Optional[str] = Query(default=None, max_length=FIELDS_MAX_LENGTH,
+                                                   description="Comma separated fields to return, "
+                                                               "e.g. id,name,owner.name")
+                     ) -> Optional[FieldSelection]:
+    return parse_fields(fields) if fields else None
@@ -0,0 +1,94 @@
+import bisect
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Any, Hashable, Iterable, List, Optional
+
+from src.events.schemas import DayOfWeek
+
+
+@dataclass
+class ConflictGroup:
+    """A maximal run of events of one day whose intervals overlap each other transitively."""
+
+    day_of_week: DayOfWeek
+    start_time: time
+    end_time: time
+    event_ids: List[int] = field(default_factory=list)
+
+
+def find_conflicts(intervals: Iterable[tuple[int, DayOfWeek, time, time]]) -> List[ConflictGroup]:
+    """
+    Groups overlapping events in a single sweep.
+
+    `intervals` are (id, day_of_week, start_time, end_time) tuples where events of the same day
+    are contiguous and sorted by start_time, as EventsRepo.get_intervals_by_schedule_id returns them.
+    Intervals are half-open, so an event ending at 10:00 doesn't conflict with one starting at 10:00.
+    """
+    conflicts = []
+    group: Optional[ConflictGroup] = None
+
+    for event_id, day_of_week, start_time, end_time in intervals:
+        if group is not None and group.day_of_week == day_of_week and start_time < group.end_time:
+            group.event_ids.append(event_id)
+            group.end_time = max(group.end_time, end_time)
+            continue
+
+        if group is not None and len(group.event_ids) > 1:
+            conflicts.append(group)
+        group = ConflictGroup(day_of_week, start_time, end_time, [event_id])
+
+    if group is not None and len(group.event_ids) > 1:
+        conflicts.append(group)
+
+    return conflicts
+
+
+class IntervalIndex:
+    """
+    Non-overlapping [start, end) intervals per key, e.g. (schedule_id, day_of_week), kept sorted by start,
+    so an overlap lookup is a binary search instead of a scan over the whole day.
+    Every interval carries an owner that a lookup returns, e.g. the id of the event.
+    """
+
+    def __init__(self):
+        self._starts: dict[Hashable, list] = {}
+        self._ends: dict[Hashable, list] = {}
+        self._owners: dict[Hashable, list] = {}
+
+    @classmethod
+    def from_sorted(cls, intervals: Iterable[tuple[Hashable, time, time, Any]]) -> "IntervalIndex":
+        """
+        Builds the index from (key, start, end, owner) tuples grouped by key and sorted by start.
+        Intervals that already overlap (stored before overlaps were rejected) are merged into one.
+        """
+        index = cls()
+        for key, start, end, owner in intervals:
+            ends = index._ends.get(key)
+            if ends and ends[-1] > start:
+                ends[-1] = max(ends[-1], end)
+                continue
+
+            index._starts.setdefault(key, []).append(start)
+            index._ends.setdefault(key, []).append(end)
+            index._owners.setdefault(key, []).append(owner)
+        return index
+
+    def find(self, key: Hashable, start: time, end: time) -> Optional[Any]:
+        """Returns the owner of an interval intersecting [start, end), if there is one."""
+        starts = self._starts.get(key)
+        if not starts:
+            return None
+
+        # the last interval starting before `end` also ends last among those, since none overlap
+        position = bisect.bisect_left(starts, end)
+        if position and self._ends[key][position - 1] > start:
+            return self._owners[key][position - 1]
+        return None
+
+    def add(self, key: Hashable, start: time, end: time, owner: Any):
+        """Adds an interval; the caller makes sure it doesn't overlap any other (see find)."""
+        starts = self._starts.setdefault(key, [])
+        position = bisect.bisect_left(starts, start)
+        starts.insert(position, start)
+        self._ends.setdefault(key, []).insert(position, end)
+        self._owners.setdefault(key, []).insert(position, owner)
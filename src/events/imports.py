@@ -0,0 +1,170 @@
+import csv
+import datetime
+import enum
+import re
+from dataclasses import dataclass
+from typing import Iterator, Optional, TextIO
+
+from pydantic import ValidationError
+
+from src.events.schemas import EventCreate, DayOfWeek
+from src.schemas import validation_error_detail
+
+BYDAY = {
+    "MO": DayOfWeek.MONDAY,
+    "TU": DayOfWeek.TUESDAY,
+    "WE": DayOfWeek.WEDNESDAY,
+    "TH": DayOfWeek.THURSDAY,
+    "FR": DayOfWeek.FRIDAY,
+    "SA": DayOfWeek.SATURDAY,
+    "SU": DayOfWeek.SUNDAY,
+}
+_WEEKDAYS = list(DayOfWeek)
+
+# RFC 5545 dur-value: either weeks alone ("P2W") or days and/or a time part ("P1DT2H30M")
+_DURATION = re.compile(r"^P(?:(?P<weeks>\d+)W|(?:(?P<days>\d+)D)?"
+                       r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?)$")
+
+
+class ImportFormat(enum.Enum):
+    ICS = "ics"
+    CSV = "csv"
+
+
+@dataclass
+class ImportedRow:
+    """An event parsed from one entry of an imported file, or the reason the entry was rejected."""
+
+    line: int
+    event: Optional[EventCreate] = None
+    error: Optional[str] = None
+
+
+def _event(line: int, schedule_id: int, **values) -> ImportedRow:
+    try:
+        return ImportedRow(line=line, event=EventCreate(schedule_id=schedule_id, **values))
+    except ValidationError as e:
+        return ImportedRow(line=line, error=validation_error_detail(e))
+
+
+def parse_csv(stream: TextIO, schedule_id: int) -> Iterator[ImportedRow]:
+    """
+    Parses a CSV file with a header row and the columns name, day_of_week, start_time, end_time
+    and an optional description. Days are names ("monday") or two-letter codes ("MO").
+    """
+    reader = csv.DictReader(stream)
+    for record in reader:
+        line = reader.line_num
+        day = (record.get("day_of_week") or "").strip()
+        values = {
+            "name": record.get("name"),
+            # the column is NOT NULL
+            "description": record.get("description") or "",
+            "day_of_week": BYDAY.get(day.upper(), day.lower()),
+            "start_time": record.get("start_time"),
+            "end_time": record.get("end_time"),
+        }
+        yield _event(line, schedule_id, **values)
+
+
+def _unfold(stream: TextIO) -> Iterator[tuple[int, str]]:
+    """Yields (line number, content line) with RFC 5545 folded lines joined back together."""
+    pending, pending_line = None, 0
+    for number, raw in enumerate(stream, start=1):
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t") and pending is not None:
+            pending += raw[1:]
+            continue
+        if pending is not None:
+            yield pending_line, pending
+        pending, pending_line = raw, number
+    if pending is not None:
+        yield pending_line, pending
+
+
+def _unescape(value: str) -> str:
+    # one pass, so the "\\" of an escaped backslash can't start another escape
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _parse_datetime(value: str) -> datetime.datetime:
+    # floating or UTC ("...Z") local time; a TZID parameter is taken as the schedule's own zone
+    return datetime.datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+
+
+def _vevent_rows(line: int, schedule_id: int, properties: dict) -> Iterator[ImportedRow]:
+    if "DTSTART" not in properties:
+        yield ImportedRow(line=line, error="DTSTART is missing")
+        return
+    if "RRULE" not in properties:
+        yield ImportedRow(line=line, error="Only events recurring weekly (RRULE:FREQ=WEEKLY) can be imported")
+        return
+
+    try:
+        start = _parse_datetime(properties["DTSTART"])
+        if "DTEND" in properties:
+            end = _parse_datetime(properties["DTEND"])
+        else:
+            duration = _DURATION.match(properties.get("DURATION", ""))
+            if duration is None:
+                raise ValueError
+            end = start + datetime.timedelta(**{unit: int(amount or 0)
+                                                for unit, amount in duration.groupdict().items()})
+    except ValueError:
+        yield ImportedRow(line=line, error="All-day events and unparsable DTSTART/DTEND/DURATION are not supported")
+        return
+
+    rule = dict(part.split("=", 1) for part in properties["RRULE"].upper().split(";") if "=" in part)
+    if rule.get("FREQ") != "WEEKLY" or rule.get("INTERVAL", "1") != "1":
+        yield ImportedRow(line=line, error="Only events recurring every week (RRULE:FREQ=WEEKLY) can be imported")
+        return
+    if end.date() != start.date():
+        yield ImportedRow(line=line, error="Events must end on the day they start")
+        return
+
+    codes = rule["BYDAY"].split(",") if "BYDAY" in rule else None
+    days = [BYDAY.get(code) for code in codes] if codes else [_WEEKDAYS[start.weekday()]]
+    if None in days:
+        yield ImportedRow(line=line, error=f"BYDAY={rule['BYDAY']} is not a list of weekdays")
+        return
+
+    for day in days:
+        yield _event(line, schedule_id,
+                     name=properties.get("SUMMARY"),
+                     description=properties.get("DESCRIPTION", ""),
+                     day_of_week=day,
+                     start_time=start.time(),
+                     end_time=end.time())
+
+
+def parse_ics(stream: TextIO, schedule_id: int) -> Iterator[ImportedRow]:
+    """
+    Parses the VEVENTs of an iCalendar file one at a time. A weekly RRULE yields one event per BYDAY
+    (or per the weekday of DTSTART); other recurrences and one-off events are reported as errors.
+    """
+    properties, event_line = None, 0
+    # components nested in a VEVENT (e.g. VALARM) have properties of their own
+    nested = 0
+    for line, content in _unfold(stream):
+        name, _, value = content.partition(":")
+        name = name.split(";", 1)[0].upper()
+        value_upper = value.strip().upper()
+
+        if properties is None:
+            if name == "BEGIN" and value_upper == "VEVENT":
+                properties, event_line = {}, line
+        elif name == "BEGIN":
+            nested += 1
+        elif name == "END" and nested:
+            nested -= 1
+        elif name == "END" and value_upper == "VEVENT":
+            yield from _vevent_rows(event_line, schedule_id, properties)
+            properties = None
+        elif not nested and name not in properties:
+            properties[name] = _unescape(value) if name in ("SUMMARY", "DESCRIPTION") else value.strip()
+
+
+PARSERS = {
+    ImportFormat.ICS: parse_ics,
+    ImportFormat.CSV: parse_csv,
+}
@@ -1,6 +1,6 @@
 from datetime import time
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.events.schemas import DayOfWeek
@@ -8,6 +8,12 @@ from src.models import TimedBaseModel
 
 
 class Event(TimedBaseModel):
+    __table_args__ = (
+        # events of a schedule in timetable (keyset) order
+        Index("ix_event_schedule_id_day_of_week_start_time", "schedule_id", "day_of_week", "start_time", "id"),
+        Index("ix_event_day_of_week_start_time", "day_of_week", "start_time", "id"),
+    )
+
     schedule_id: Mapped[int] = mapped_column(ForeignKey("schedule.id"))
     name: Mapped[str] = mapped_column(nullable=False)
     description: Mapped[str]
@@ -15,4 +21,4 @@ class Event(TimedBaseModel):
     start_time: Mapped[time] = mapped_column(nullable=False)
     end_time: Mapped[time] = mapped_column(nullable=False)
 
-    schedule: Mapped["Schedule"] = relationship(back_populates="events", lazy="selectin")
+    schedule: Mapped["Schedule"] = relationship(back_populates="events")
@@ -1,38 +1,263 @@
-from sqlalchemy import select
+import heapq
+import itertools
+from datetime import time
+from typing import Any, Optional, Sequence, Union, Iterable
+
+from sqlalchemy import select, insert, func, tuple_, true
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
+from src.events.conflicts import IntervalIndex
 from src.events.models import Event
-from src.events.schemas import EventCreate
-from src.repositories import BaseRepo
+from src.events.schemas import EventCreate, DayOfWeek
+from src.exceptions import EventOverlapException
+from src.fields import FieldSelection
+from src.repositories import BaseRepo, Page
+from src.schedules.models import Schedule
+from src.subscriptions.models import Subscription
+
+# the database sorts the enum in declaration order, merges in Python must do the same
+_DAY_POSITIONS = {day: position for position, day in enumerate(DayOfWeek)}
 
 
 class EventsRepo(BaseRepo[Event, EventCreate]):
+    load_profiles = {
+        "event_with_schedule": ("schedule",),
+    }
+
     def __init__(self, session: AsyncSession):
         super().__init__(session, Event, EventCreate)
 
-    async def get_all_by_schedule_id(self, schedule_id: int, page: int, size: int):
-        offset_min = page * size
-        offset_max = (page + 1) * size
+    def keyset(self) -> tuple:
+        return self.model.day_of_week, self.model.start_time, self.model.id
+
+    async def create(self, scheme: EventCreate):
+        """Inserts an event unless it overlaps another event of the same schedule on the same day."""
+        await self.lock_schedules([scheme.schedule_id])
+
+        overlapping_id = await self.get_overlapping_event_id(schedule_id=scheme.schedule_id,
+                                                             day_of_week=scheme.day_of_week,
+                                                             start_time=scheme.start_time,
+                                                             end_time=scheme.end_time)
+        if overlapping_id is not None:
+            await self.session.rollback()
+            raise EventOverlapException(overlapping_id)
+
+        return await super().create(scheme)
+
+    async def create_many(self, schemes: Sequence[EventCreate]) -> list[Union[int, EventOverlapException]]:
+        """
+        Inserts events in one transaction with a single multi-row INSERT ... RETURNING.
+        Events that overlap an existing event or an earlier item are skipped; the result holds,
+        for every scheme, either the id of the created event or the reason it was skipped.
+        """
+        if not schemes:
+            return []
+
+        schedule_ids = {scheme.schedule_id for scheme in schemes}
+        await self.lock_schedules(schedule_ids)
+        index = await self.get_interval_index(schedule_ids)
 
+        results: list = [None] * len(schemes)
+        accepted = []
+        for position, scheme in enumerate(schemes):
+            overlap = self.check_overlap(index, scheme, owner=EventOverlapException(item_index=position))
+            if overlap is None:
+                accepted.append(position)
+            else:
+                results[position] = overlap
+
+        if accepted:
+            create_smth = insert(self.model).returning(self.model.id, sort_by_parameter_order=True)
+            created = await self.session.execute(create_smth, [self.row(schemes[position]) for position in accepted])
+            for position, event_id in zip(accepted, created.scalars().all()):
+                results[position] = event_id
+
+        await self.session.commit()
+        return results
+
+    async def insert_many(self, schemes: Sequence[EventCreate]):
+        """Inserts events with one multi-row INSERT without committing; the caller owns the transaction."""
+        if schemes:
+            await self.session.execute(insert(self.model).values([self.row(scheme) for scheme in schemes]))
+
+    @staticmethod
+    def row(scheme: EventCreate) -> dict:
+        """The column values of an event for a multi-row INSERT."""
+        # the column is NOT NULL, but the scheme lets the description be left out
+        return {**scheme.dict(), "description": scheme.description or ""}
+
+    async def get_interval_index(self, schedule_ids) -> IntervalIndex:
+        """
+        Indexes the intervals of the events of several schedules by (schedule_id, day_of_week);
+        a hit returns an EventOverlapException naming the event. Lock the schedules first to keep it current.
+        """
+        select_smth = (
+            select(self.model.id, self.model.schedule_id, self.model.day_of_week,
+                   self.model.start_time, self.model.end_time).where(
+                self.model.schedule_id.in_(schedule_ids)
+            )
+            .order_by(self.model.schedule_id, *self.keyset())
+        )
+
+        rows = (await self.session.execute(select_smth)).all()
+        return IntervalIndex.from_sorted(
+            ((schedule_id, day_of_week), start_time, end_time, EventOverlapException(event_id=event_id))
+            for event_id, schedule_id, day_of_week, start_time, end_time in rows
+        )
+
+    @staticmethod
+    def check_overlap(index: IntervalIndex, scheme: EventCreate, owner: Any) -> Optional[EventOverlapException]:
+        """Returns the overlap of an event with the index or, if there is none, adds the event under owner."""
+        key = (scheme.schedule_id, scheme.day_of_week)
+        overlap = index.find(key, scheme.start_time, scheme.end_time)
+        if overlap is None:
+            index.add(key, scheme.start_time, scheme.end_time, owner)
+        return overlap
+
+    async def lock_schedules(self, schedule_ids):
+        """
+        Locks schedule rows until the end of the transaction. Concurrent inserts into one schedule
+        are serialised on it, so two overlapping events can't both pass the check.
+        """
+        await self.session.execute(
+            select(Schedule.id).where(Schedule.id.in_(schedule_ids)).order_by(Schedule.id).with_for_update()
+        )
+
+    async def get_overlapping_event_id(self,
+                                       schedule_id: int,
+                                       day_of_week: DayOfWeek,
+                                       start_time: time,
+                                       end_time: time,
+                                       exclude_id: Optional[int] = None) -> Optional[int]:
+        """
+        Returns the id of an event of the schedule whose [start_time, end_time) interval intersects the given one.
+        The (schedule_id, day_of_week, start_time) index turns this into a range scan over one day.
+        """
+        select_smth = (
+            select(self.model.id).filter_by(
+                schedule_id=schedule_id,
+                day_of_week=day_of_week
+            )
+            .where(self.model.start_time < end_time, self.model.end_time > start_time)
+            .limit(1)
+        )
+
+        if exclude_id is not None:
+            select_smth = select_smth.where(self.model.id != exclude_id)
+
+        return (await self.session.execute(select_smth)).scalar_one_or_none()
+
+    async def get_all_by_schedule_id(self,
+                                     schedule_id: int,
+                                     page: int,
+                                     size: int,
+                                     cursor: Optional[str] = None,
+                                     with_count: bool = False,
+                                     profile: Optional[str] = None,
+                                     fields: Optional[FieldSelection] = None):
         select_smth = (
             select(self.model).filter_by(
                 schedule_id=schedule_id
             )
         )
 
+        return await self.get_page(select_smth, page, size, cursor, with_count, profile, fields)
+
+    async def get_agenda_by_subscriber_id(self,
+                                          subscriber_id: int,
+                                          size: int,
+                                          days: Optional[Iterable[DayOfWeek]] = None,
+                                          cursor: Optional[str] = None) -> Page[Event]:
+        """
+        Returns one page of the events of every schedule the user is subscribed to, as a single timeline
+        in keyset order. A LATERAL subquery per subscription reads at most a page (plus one row, to detect
+        the next page) of that schedule's events as a range scan of the (schedule_id, day_of_week, start_time)
+        index; those per-schedule sorted streams are then merged.
+        """
+        select_smth = (
+            select(self.model)
+            .where(self.model.schedule_id == Subscription.schedule_id)
+            .order_by(*self.keyset())
+            .limit(size + 1)
+        )
+
+        if days:
+            select_smth = select_smth.where(self.model.day_of_week.in_(list(days)))
+        if cursor is not None:
+            select_smth = select_smth.where(tuple_(*self.keyset()) > self.decode_cursor(cursor))
+
+        stream = select_smth.lateral()
+        entity = aliased(self.model, stream)
+        select_smth = (
+            select(entity)
+            .select_from(Subscription)
+            .join(stream, true())
+            .where(Subscription.subscriber_id == subscriber_id)
+            .order_by(entity.schedule_id, entity.day_of_week, entity.start_time, entity.id)
+        )
+
         result = (await self.session.execute(select_smth)).scalars().all()
-        if not result:
-            return []
-        return result[offset_min:offset_max]
 
-    async def get_events_count_by_schedule_id(self, schedule_id: int):
+        streams = [list(stream) for _, stream in itertools.groupby(result, key=lambda event: event.schedule_id)]
+        timeline = list(itertools.islice(heapq.merge(*streams, key=self.sort_key), size + 1))
+
+        items = timeline[:size]
+        next_cursor = self.encode_cursor(items[-1]) if len(timeline) > size else None
+        return Page(items=items, next_cursor=next_cursor)
+
+    @staticmethod
+    def sort_key(event: Event) -> tuple:
+        """The keyset of an event as a Python sort key."""
+        return _DAY_POSITIONS[event.day_of_week], event.start_time, event.id
+
+    def stream_by_schedule_id(self, schedule_id: int, chunk_size: int = 1000):
+        """Yields the events of a schedule in keyset order through a server-side cursor."""
         select_smth = (
             select(self.model).filter_by(
                 schedule_id=schedule_id
             )
         )
 
-        result = (await self.session.execute(select_smth)).scalars().all()
-        if not result:
-            return 0
-        return len(result)
\ No newline at end of file
+        return self.stream(select_smth, chunk_size)
+
+    async def get_week_by_schedule_id(self, schedule_id: int):
+        """Returns all events of a schedule ordered by day of week, then start_time."""
+        select_smth = (
+            select(self.model).filter_by(
+                schedule_id=schedule_id
+            )
+            .order_by(*self.keyset())
+        )
+
+        return (await self.session.execute(select_smth)).scalars().all()
+
+    async def get_intervals_by_schedule_id(self, schedule_id: int):
+        """Returns (id, day_of_week, start_time, end_time) rows of a schedule's events in keyset order."""
+        select_smth = (
+            select(self.model.id, self.model.day_of_week, self.model.start_time, self.model.end_time).filter_by(
+                schedule_id=schedule_id
+            )
+            .order_by(*self.keyset())
+        )
+
+        return (await self.session.execute(select_smth)).all()
+
+    async def get_validators_by_schedule_id(self, schedule_id: int):
+        """Returns the newest updated_at and the number of events of a schedule."""
+        select_smth = (
+            select(func.max(self.model.updated_at), func.count(self.model.id)).filter_by(
+                schedule_id=schedule_id
+            )
+        )
+
+        return (await self.session.execute(select_smth)).one()
+
+    async def get_events_count_by_schedule_id(self, schedule_id: int):
+        select_smth = (
+            select(func.count(self.model.id)).filter_by(
+                schedule_id=schedule_id
+            )
+        )
+
+        return (await self.session.execute(select_smth)).scalar_one()
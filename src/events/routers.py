@@ -1,21 +1,29 @@
 import math
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.cache import Principal
 from src.auth.config import fastapi_users
-from src.dependencies import get_pagination_params, PaginationParams
+from src.conditional import Validators, not_modified
+from src.dependencies import get_pagination_params, PaginationParams, get_fields, get_exact
+from src.fields import FieldSelection, sparse_scheme
 from src.events.repositories import EventsRepo
-from src.events.schemas import EventCreate, EventWithScheduleRead
-from src.exceptions import ItemNotFoundByIdException
-from src.responses import paginated_response_content
+from src.events.schemas import EventCreate, EventWithScheduleRead, EventBulkCreateResult, EventBulkError
+from src.export import ExportFormat, export_response
+from src.exceptions import ItemNotFoundByIdException, EventOverlapException
+from src.responses import paginated_response, json_response
+from src.schedules.cache import invalidate_schedule, schedule_cache_control
 from src.schedules.repositories import ScheduleRepo
-from src.schemas import PaginatedResponseScheme
-from src.setup import get_async_session
-from src.users.models import User
+from src.schemas import PaginatedResponseScheme, validation_error_detail
+from src.setup import get_async_session, get_async_read_session
 
 
+EVENTS_BULK_MAX_SIZE = 1000
+
 router = APIRouter(
     prefix="/events",
     tags=["events"],
@@ -25,36 +33,65 @@ current_user = fastapi_users.current_user()
 
 
 @router.get("/", response_model=PaginatedResponseScheme[EventWithScheduleRead])
-async def get_events(session: AsyncSession = Depends(get_async_session),
-                     user: User = Depends(current_user),
-                     pagination_params: PaginationParams = Depends(get_pagination_params)):
+async def get_events(session: AsyncSession = Depends(get_async_read_session),
+                     user: Principal = Depends(current_user),
+                     pagination_params: PaginationParams = Depends(get_pagination_params),
+                     fields: Optional[FieldSelection] = Depends(get_fields),
+                     exact: bool = Depends(get_exact)):
     if not user.is_superuser:
         raise HTTPException(status_code=403, detail="Only superusers can see all schedules using this endpoint")
 
+    scheme = sparse_scheme(EventWithScheduleRead, fields)
     repo = EventsRepo(session)
 
-    count = await repo.get_count()
-    result = await repo.get_all(page=pagination_params.page, size=pagination_params.size)
+    if exact:
+        count, approximate_count = await repo.get_count(), False
+    else:
+        count, approximate_count = await repo.get_approximate_count()
+    result = await repo.get_all(page=pagination_params.page, size=pagination_params.size,
+                                cursor=pagination_params.cursor,
+                                profile="event_with_schedule",
+                                fields=fields)
+
+    return paginated_response(scheme,
+                              result,
+                              pagination_params.page,
+                              pagination_params.size,
+                              count,
+                              approximate_count=approximate_count)
+
+
+@router.get("/export")
+async def export_events(user: Principal = Depends(current_user),
+                        export_format: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format")):
+    if not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Only superusers can export events using this endpoint")
 
-    return paginated_response_content(result, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      count)
+    return export_response(EventsRepo, EventWithScheduleRead, export_format, filename="events",
+                           profile="event_with_schedule")
 
 
 @router.get("/{id}", response_model=EventWithScheduleRead)
 async def get_event(id: int,
-                    session: AsyncSession = Depends(get_async_session),
-                    user: User = Depends(current_user)):
+                    request: Request,
+                    session: AsyncSession = Depends(get_async_read_session),
+                    user: Principal = Depends(current_user)):
     try:
         repo = EventsRepo(session)
 
-        result = await repo.get_by_id(id)
-        if result and (not user.is_superuser or result.schedule.owner_id != user.id):
+        result = await repo.get_by_id(id, profile="event_with_schedule")
+        if result and not user.is_superuser and result.schedule.owner_id != user.id:
             raise HTTPException(status_code=403,
                                 detail="Only superusers or schedule owner can see all schedules. You are none of them")
 
-        return await repo.get_by_id(id)
+        last_modified = max(result.updated_at, result.schedule.updated_at)
+        validators = Validators.from_state("event", result.id, last_modified, result.schedule.subscriber_count,
+                                           result.schedule.event_count, last_modified=last_modified)
+        headers = validators.headers(schedule_cache_control(result.schedule))
+        if validators.matches(request):
+            return not_modified(headers)
+
+        return json_response(EventWithScheduleRead, result, headers)
 
     except ItemNotFoundByIdException:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -63,7 +100,7 @@ async def get_event(id: int,
 @router.post("/")
 async def create_event(new_event: EventCreate,
                        session: AsyncSession = Depends(get_async_session),
-                       user: User = Depends(current_user)):
+                       user: Principal = Depends(current_user)):
     try:
         repo = EventsRepo(session)
 
@@ -75,24 +112,78 @@ async def create_event(new_event: EventCreate,
                                 detail="Only superusers or schedule owner can see all schedules. You are none of them")
 
         await repo.create(new_event)
+        invalidate_schedule(new_event.schedule_id)
         return {"status": "success"}
+    except EventOverlapException as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except IntegrityError:
         raise HTTPException(status_code=404, detail="Entry by specified foreign key/id doesn't exists")
 
 
+@router.post("/bulk", response_model=EventBulkCreateResult)
+async def create_events(new_events: List[Dict[str, Any]] = Body(max_length=EVENTS_BULK_MAX_SIZE),
+                        session: AsyncSession = Depends(get_async_session),
+                        user: Principal = Depends(current_user)):
+    """
+    Creates EventCreate items in one transaction. Every item that can't be created (invalid, in a schedule
+    that is missing or not the user's, or overlapping) is reported in errors by its position; the rest are created.
+    """
+    ids = [None] * len(new_events)
+    errors = []
+
+    # validated one by one rather than as the body's type, so an invalid item doesn't reject the others
+    events = {}
+    for index, item in enumerate(new_events):
+        try:
+            events[index] = EventCreate.model_validate(item)
+        except ValidationError as e:
+            errors.append(EventBulkError(index=index, status_code=422, detail=validation_error_detail(e)))
+
+    schedules = await ScheduleRepo(session).get_by_ids({event.schedule_id for event in events.values()})
+
+    allowed = []
+    for index, event in events.items():
+        schedule = schedules.get(event.schedule_id)
+        if schedule is None:
+            errors.append(EventBulkError(index=index, status_code=404, detail="Schedule not found"))
+        elif not user.is_superuser and schedule.owner_id != user.id:
+            errors.append(EventBulkError(index=index, status_code=403,
+                                         detail="Only superusers or schedule owner can add events. "
+                                                "You are none of them"))
+        else:
+            allowed.append(index)
+
+    results = await EventsRepo(session).create_many([events[index] for index in allowed])
+    for index, result in zip(allowed, results):
+        if isinstance(result, EventOverlapException):
+            if result.item_index is not None:
+                # create_many only saw the allowed items; point at the item's position in the request
+                result = EventOverlapException(item_index=allowed[result.item_index])
+            errors.append(EventBulkError(index=index, status_code=409, detail=str(result)))
+        else:
+            ids[index] = result
+
+    for schedule_id in {events[index].schedule_id for index in allowed}:
+        invalidate_schedule(schedule_id)
+
+    errors.sort(key=lambda error: error.index)
+    return EventBulkCreateResult(ids=ids, errors=errors)
+
+
 @router.delete("/{id}")
 async def delete_event(id: int,
                        session: AsyncSession = Depends(get_async_session),
-                       user: User = Depends(current_user)):
+                       user: Principal = Depends(current_user)):
     # TODO: refactor this
 
     repo = EventsRepo(session)
 
-    schedule = (await repo.get_by_id(id)).schedule
+    schedule = (await repo.get_by_id(id, profile="event_with_schedule")).schedule
 
     if not user.is_superuser and schedule.owner_id != user.id:
         raise HTTPException(status_code=403,
                             detail="Only superusers or schedule owner can delete this schedule. You are none of them")
 
     await repo.delete_by_id(id)
+    invalidate_schedule(schedule.id)
     return {"status": "success"}
@@ -1,7 +1,9 @@
 import datetime
 import enum
 from datetime import time
-from typing import Optional
+from typing import Dict, List, Optional
+
+from pydantic import model_validator
 
 from src.schemas import TimedBaseScheme, BaseScheme
 
@@ -23,6 +25,13 @@ class EventBase(BaseScheme):
     start_time: time
     end_time: time
 
+    @model_validator(mode="after")
+    def check_times(self) -> "EventBase":
+        # events are [start_time, end_time) intervals within one day; the overlap checks rely on it
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        return self
+
 
 class EventCreate(EventBase):
     schedule_id: int
@@ -39,3 +48,62 @@ from src.schedules.schemas import ScheduleRead
 
 class EventWithScheduleRead(EventRead):
     schedule: 'ScheduleRead'
+
+
+class ScheduleWeekRead(BaseScheme):
+    schedule_id: int
+    # every day of the week, Monday first, with its events sorted by start_time
+    days: Dict[DayOfWeek, List[EventRead]]
+
+
+class EventConflictRead(BaseScheme):
+    day_of_week: DayOfWeek
+    # the span covered by the overlapping events
+    start_time: time
+    end_time: time
+    event_ids: List[int]
+
+
+class ScheduleConflictsRead(BaseScheme):
+    schedule_id: int
+    conflicts: List[EventConflictRead]
+
+
+class EventBulkError(BaseScheme):
+    # position of the item in the request body
+    index: int
+    status_code: int
+    detail: str
+
+
+class EventBulkCreateResult(BaseScheme):
+    # aligned with the request body; None where the item was rejected
+    ids: List[Optional[int]]
+    errors: List[EventBulkError]
+
+
+class AgendaEventRead(EventRead):
+    schedule_id: int
+
+
+class AgendaRead(BaseScheme):
+    # events of all subscribed schedules ordered by day of week, then start_time
+    result: List[AgendaEventRead]
+    size: int
+    next_cursor: Optional[str] = None
+
+
+class EventImportError(BaseScheme):
+    # line of the CSV record or of the VEVENT's BEGIN in the uploaded file
+    line: int
+    detail: str
+
+
+class EventImportReport(BaseScheme):
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    batches: int = 0
+    errors: List[EventImportError] = []
+    # set when there were more errors than the report lists
+    errors_truncated: bool = False
@@ -1,6 +1,27 @@
+from typing import Optional
+
+
 class ItemNotFoundByIdException(Exception):
     pass
 
 
 class PermissionDeniedException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class InvalidCursorException(Exception):
+    pass
+
+
+class InvalidFieldsException(Exception):
+    pass
+
+
+class EventOverlapException(Exception):
+    def __init__(self, event_id: Optional[int] = None, item_index: Optional[int] = None):
+        if event_id is not None:
+            super().__init__(f"Event overlaps event {event_id} of the same schedule")
+        else:
+            super().__init__(f"Event overlaps item {item_index} of the same request")
+        self.event_id = event_id
+        self.item_index = item_index
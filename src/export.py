@@ -0,0 +1,109 @@
+import csv
+import enum
+import io
+from typing import Callable, Optional, Sequence, Type
+
+import anyio
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from src.repositories import BaseRepo
+from src.setup import async_read_session_maker
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+class ExportFormat(enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+class ExportResponse(StreamingResponse):
+    """
+    StreamingResponse that always closes its body iterator. Starlette cancels the send loop when
+    the client disconnects and leaves a suspended generator to the garbage collector; closing it
+    here releases the database cursor and connection right away.
+    """
+
+    async def stream_response(self, send) -> None:
+        try:
+            await super().stream_response(send)
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.body_iterator.aclose()
+
+
+def csv_columns(scheme: Type[BaseModel], prefix: str = "") -> list[str]:
+    """Column names of a scheme, nested models flattened into dotted names (e.g. "schedule.name")."""
+    columns = []
+    for name, field in scheme.model_fields.items():
+        if isinstance(field.annotation, type) and issubclass(field.annotation, BaseModel):
+            columns.extend(csv_columns(field.annotation, f"{prefix}{name}."))
+        else:
+            columns.append(prefix + name)
+    return columns
+
+
+def _flatten(row: dict, prefix: str = "") -> dict:
+    flat = {}
+    for name, value in row.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{name}."))
+        else:
+            flat[prefix + name] = value
+    return flat
+
+
+def _serialiser(scheme: Type[BaseModel], export_format: ExportFormat) -> Callable[[Sequence], str]:
+    if export_format == ExportFormat.NDJSON:
+        return lambda items: "".join(scheme.model_validate(item).model_dump_json() + "\n" for item in items)
+
+    columns = csv_columns(scheme)
+
+    def serialise(items: Sequence) -> str:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        for item in items:
+            writer.writerow(_flatten(scheme.model_validate(item).model_dump(mode="json")))
+        return buffer.getvalue()
+
+    return serialise
+
+
+def export_response(repo_type: Callable[..., BaseRepo],
+                    scheme: Type[BaseModel],
+                    export_format: ExportFormat,
+                    filename: str,
+                    profile: Optional[str] = None) -> ExportResponse:
+    """
+    Streams a whole table as NDJSON or CSV in chunks of EXPORT_CHUNK_SIZE rows.
+
+    The session is opened by the body generator rather than taken from a dependency:
+    dependency teardown runs before a streamed body is sent, which would close it mid-export.
+    """
+    serialise = _serialiser(scheme, export_format)
+
+    async def body():
+        if export_format == ExportFormat.CSV:
+            yield ",".join(csv_columns(scheme)) + "\r\n"
+
+        session = async_read_session_maker()
+        partitions = repo_type(session).stream_all(chunk_size=EXPORT_CHUNK_SIZE, profile=profile)
+        try:
+            async for partition in partitions:
+                yield serialise(partition)
+        finally:
+            # also runs when the export is cancelled, so the cleanup itself must not be cancelled
+            with anyio.CancelScope(shield=True):
+                await partitions.aclose()
+                await session.close()
+
+    return ExportResponse(body(),
+                          media_type=MEDIA_TYPES[export_format],
+                          headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'})
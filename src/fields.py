@@ -0,0 +1,77 @@
+import typing
+from functools import lru_cache
+from typing import Any, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, create_model
+
+from src.exceptions import InvalidFieldsException
+
+# a parsed ?fields= value: sorted (name, nested selection) pairs, where a nested selection of None selects
+# the whole field. It's hashable, so it can key caches, and equal selections compare equal however they were
+# written ("id,name" and "name,id").
+FieldSelection = Tuple[Tuple[str, Optional["FieldSelection"]], ...]
+
+FIELDS_MAX_LENGTH = 1000
+
+
+def parse_fields(fields: str) -> FieldSelection:
+    """
+    Parses a comma separated list of field names into a selection.
+    Dotted names (e.g. "schedule.name") select fields of nested objects, a bare name selects the whole field.
+    """
+    tree = {}
+    for path in fields.split(","):
+        names = path.strip().split(".")
+        if not all(names):
+            raise InvalidFieldsException(f"Field {path.strip()!r} is not valid")
+
+        node = tree
+        for name in names[:-1]:
+            if name in node and node[name] is None:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+    return _freeze(tree)
+
+
+def _freeze(tree: dict) -> FieldSelection:
+    return tuple(sorted((name, None if nested is None else _freeze(nested)) for name, nested in tree.items()))
+
+
+@lru_cache(maxsize=512)
+def sparse_scheme(scheme: Type[BaseModel], selection: Optional[FieldSelection]) -> Type[BaseModel]:
+    """
+    A copy of the scheme with only the selected fields, nested models narrowed the same way.
+    The schemes are cached, so responses built from them reuse the cached dumpers too.
+    """
+    if selection is None:
+        return scheme
+
+    definitions = {}
+    for name, nested in selection:
+        field = scheme.model_fields.get(name)
+        if field is None:
+            raise InvalidFieldsException(f"Unknown field {name!r}")
+
+        annotation = field.annotation
+        if nested is not None:
+            annotation = _narrow(annotation, nested, name)
+        default = ... if field.is_required() else field.default
+        definitions[name] = (annotation, default)
+
+    return create_model(f"{scheme.__name__}Fields", __config__=scheme.model_config, **definitions)
+
+
+def _narrow(annotation: Any, selection: FieldSelection, name: str) -> Any:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return sparse_scheme(annotation, selection)
+
+    origin = typing.get_origin(annotation)
+    if origin is Union:
+        return Union[tuple(arg if arg is type(None) else _narrow(arg, selection, name)
+                           for arg in typing.get_args(annotation))]
+    if origin is list:
+        return typing.List[_narrow(typing.get_args(annotation)[0], selection, name)]
+
+    raise InvalidFieldsException(f"Field {name!r} has no nested fields")
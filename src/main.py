@@ -1,8 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from src.auth.config import auth_backend, fastapi_users
 from src.events.routers import router as events_router
+from src.exceptions import InvalidCursorException, InvalidFieldsException
+from src.metrics.routers import router as metrics_router
 from src.schedules.routers import router as schedules_router
 from src.subscriptions.routers import router as subscriptions_router
 from src.users.routers import router as user_routers
@@ -10,7 +13,9 @@ from src.users.routers_protected import router as user_routers_protected
 from src.users.schemas import UserRead, UserCreate
 
 app = FastAPI(
-    title="Scheduler API"
+    title="Scheduler API",
+    # routes that return models or dicts are rendered by orjson instead of the stdlib encoder
+    default_response_class=ORJSONResponse,
 )
 
 origins = [
@@ -27,6 +32,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(InvalidCursorException)
+async def invalid_cursor_exception_handler(request: Request, exc: InvalidCursorException):
+    return ORJSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(InvalidFieldsException)
+async def invalid_fields_exception_handler(request: Request, exc: InvalidFieldsException):
+    return ORJSONResponse(status_code=400, content={"detail": str(exc)})
+
+
 app.include_router(
     fastapi_users.get_auth_router(auth_backend),
     prefix="/auth/jwt",
@@ -44,5 +60,6 @@ app.include_router(events_router)
 app.include_router(subscriptions_router)
 app.include_router(user_routers)
 app.include_router(user_routers_protected)
+app.include_router(metrics_router)
 
 current_user = fastapi_users.current_user()
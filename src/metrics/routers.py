@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from src.auth.cache import Principal, principal_cache, verified_token_cache
+from src.auth.config import fastapi_users
+from src.pool import pool_status
+from src.schedules.cache import week_cache, public_response_cache
+from src.setup import engine, replica_engines
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+)
+
+current_user = fastapi_users.current_user()
+
+
+@router.get("/pool")
+async def get_pool_metrics(user: Principal = Depends(current_user)):
+    if not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Only superusers can retrieve metrics using this endpoint")
+
+    return {
+        "primary": pool_status(engine.pool),
+        "replicas": [pool_status(replica.pool) for replica in replica_engines],
+    }
+
+
+@router.get("/cache")
+async def get_cache_metrics(user: Principal = Depends(current_user)):
+    if not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Only superusers can retrieve metrics using this endpoint")
+
+    return {
+        "public_responses": {
+            **public_response_cache.statistics.as_dict(),
+            "entries": len(public_response_cache),
+            "bytes": public_response_cache.current_bytes,
+            "max_bytes": public_response_cache.max_bytes,
+        },
+        "week": {**week_cache.statistics.as_dict(), "entries": len(week_cache)},
+        "principals": {**principal_cache.statistics.as_dict(), "entries": len(principal_cache)},
+        "verified_tokens": {**verified_token_cache.statistics.as_dict(), "entries": len(verified_token_cache)},
+    }
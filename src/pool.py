@@ -0,0 +1,61 @@
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolStatistics:
+    """Counters collected on every connection checkout."""
+
+    checkouts: int = 0
+    timeouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record_wait(self, wait: float):
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that measures how long each checkout waits for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statistics = PoolStatistics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.statistics.timeouts += 1
+            raise
+        # failed attempts aren't checkouts; timeouts are counted on their own
+        self.statistics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def pool_status(pool) -> dict:
+    """Returns the live occupancy of a pool together with its checkout statistics."""
+
+    status = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+    }
+
+    statistics = getattr(pool, "statistics", None)
+    if statistics is not None:
+        status.update(
+            checkouts=statistics.checkouts,
+            timeouts=statistics.timeouts,
+            avg_wait_ms=statistics.total_wait / statistics.checkouts * 1000 if statistics.checkouts else 0.0,
+            max_wait_ms=statistics.max_wait * 1000,
+        )
+    return status
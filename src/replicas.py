@@ -0,0 +1,46 @@
+import itertools
+from typing import Callable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+BALANCING_STRATEGIES = ("round_robin", "least_busy")
+
+
+class ReplicaSet:
+    """
+    Hands out sessions bound to one of several read engines.
+
+    Attributes
+    ----------
+    engines : Sequence[AsyncEngine]
+        The read engines; any object exposing .pool.checkedout() works, so tests can pass stubs.
+    balancing : str
+        "round_robin" cycles through the engines, "least_busy" picks the engine
+        with the fewest checked out connections.
+    """
+
+    def __init__(self, engines: Sequence[AsyncEngine], balancing: str = "round_robin"):
+        if not engines:
+            raise ValueError("ReplicaSet needs at least one engine")
+        if balancing not in BALANCING_STRATEGIES:
+            raise ValueError(f"Unknown replica balancing {balancing!r}, expected one of {BALANCING_STRATEGIES}")
+
+        self.engines = list(engines)
+        self.balancing = balancing
+        self._session_makers = [async_sessionmaker(engine, expire_on_commit=False) for engine in self.engines]
+        self._round_robin = itertools.cycle(range(len(self.engines)))
+
+    def choose(self) -> int:
+        if self.balancing == "least_busy":
+            return min(range(len(self.engines)), key=lambda index: self.engines[index].pool.checkedout())
+        return next(self._round_robin)
+
+    def __call__(self) -> AsyncSession:
+        return self._session_makers[self.choose()]()
+
+
+def read_session_maker(engines: Sequence[AsyncEngine],
+                       balancing: str,
+                       primary: Callable[[], AsyncSession]) -> Callable[[], AsyncSession]:
+    """The session maker for reads: a ReplicaSet over the engines, or the primary's maker when there are none."""
+    return ReplicaSet(engines, balancing=balancing) if engines else primary
@@ -1,16 +1,87 @@
+import base64
+import binascii
+import datetime
+import enum
+import json
 import math
-from typing import Generic, TypeVar, Type
+from dataclasses import dataclass
+from typing import Generic, TypeVar, Type, Optional, Sequence, Iterable, AsyncIterator
 
-from sqlalchemy import select, insert, func
+from sqlalchemy import select, insert, func, tuple_, Select, inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, load_only
 
-from src.exceptions import ItemNotFoundByIdException
+from src.exceptions import ItemNotFoundByIdException, InvalidCursorException
+from src.fields import FieldSelection
 
 T = TypeVar('T')
 V = TypeVar('V')
 
+# below this many (estimated) rows counting exactly is cheap, and estimates of small tables are the least reliable
+APPROXIMATE_COUNT_THRESHOLD = 10_000
+
+
+@dataclass
+class Page(Generic[T]):
+    items: Sequence[T]
+    next_cursor: Optional[str] = None
+    count: Optional[int] = None
+
+
+def _dump_key_value(value):
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _load_key_value(column, value):
+    python_type = column.type.python_type
+    if issubclass(python_type, enum.Enum):
+        return python_type[value]
+    if issubclass(python_type, (datetime.date, datetime.time)):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def _loader_options(target, relationships: dict, fields: Optional[FieldSelection], required: tuple = ()) -> list:
+    if fields is None:
+        options = []
+        for name, nested in relationships.items():
+            attribute = getattr(target, name)
+            loader = joinedload(attribute)
+            nested_options = _loader_options(attribute.property.mapper.class_, nested, None)
+            options.append(loader.options(*nested_options) if nested_options else loader)
+        return options
+
+    mapper = inspect(target).mapper
+    # load_only always adds the primary key, but needs at least one column to be given
+    columns = list(required) or [getattr(target, column.key) for column in mapper.primary_key]
+    projected = True
+    options = []
+    for name, nested in fields:
+        if name in mapper.column_attrs:
+            columns.append(getattr(target, name))
+        elif name in relationships:
+            attribute = getattr(target, name)
+            loader = joinedload(attribute)
+            nested_options = _loader_options(attribute.property.mapper.class_, relationships[name], nested)
+            options.append(loader.options(*nested_options) if nested_options else loader)
+        else:
+            # not a plain column (e.g. a property computed from others), so every column is fetched
+            projected = False
+
+    if projected:
+        options.append(load_only(*columns))
+    return options
+
 
 class BaseRepo(Generic[T, V]):
+    # named sets of relationships to eager load, e.g. {"schedule_with_owner": ("owner",)};
+    # each one should cover exactly what its response model serialises
+    load_profiles: dict[str, tuple[str, ...]] = {}
+
     def __init__(self,
                  session: AsyncSession,
                  model: Type[T],
@@ -30,24 +101,165 @@ class BaseRepo(Generic[T, V]):
         await self.session.commit()
         return result.scalar_one()
 
-    async def get_all(self, page: int, size: int):
-        offset_min = page * size
-        offset_max = (page + 1) * size
+    def load_options(self,
+                     profile: Optional[str],
+                     entity=None,
+                     fields: Optional[FieldSelection] = None) -> list:
+        """
+        Builds loader options for a load profile. Relationships are joined eagerly,
+        dotted paths (e.g. "schedule.owner") are chained.
+        With a field selection only the selected columns (and the keyset) are fetched
+        and relationships of the profile that weren't selected aren't joined.
+        """
+        if profile is not None and profile not in self.load_profiles:
+            raise ValueError(f'Unknown load profile {profile!r} for {self.model.__name__}')
+
+        relationships = {}
+        for path in self.load_profiles[profile] if profile is not None else ():
+            node = relationships
+            for name in path.split("."):
+                node = node.setdefault(name, {})
+
+        target = entity if entity is not None else self.model
+        keyset = tuple(getattr(target, column.key) for column in self.keyset())
+        return _loader_options(target, relationships, fields, keyset)
+
+    def keyset(self) -> tuple:
+        """Columns that give the model a stable, unique ordering for pagination."""
+        return (self.model.id,)
+
+    def encode_cursor(self, item: T) -> str:
+        values = [_dump_key_value(getattr(item, column.key)) for column in self.keyset()]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor: str) -> tuple:
+        keyset = self.keyset()
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(keyset):
+                raise ValueError
+            return tuple(_load_key_value(column, value) for column, value in zip(keyset, values))
+        except (binascii.Error, UnicodeError, TypeError, KeyError, ValueError):
+            raise InvalidCursorException(f'Cursor {cursor!r} is not valid')
+
+    def paginate(self,
+                 query: Select,
+                 page: int,
+                 size: int,
+                 cursor: Optional[str] = None,
+                 entity=None) -> Select:
+        """
+        Orders the query by the keyset and limits it to the requested page.
+        With a cursor the query seeks past the last seen key instead of using OFFSET.
+        """
+        keyset = self.keyset()
+        if entity is not None:
+            keyset = tuple(getattr(entity, column.key) for column in keyset)
+
+        query = query.order_by(*keyset).limit(size)
+
+        if cursor is None:
+            return query.offset(page * size)
+        return query.where(tuple_(*keyset) > self.decode_cursor(cursor))
+
+    async def count(self, query: Select) -> int:
+        count_smth = (
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+
+        return (await self.session.execute(count_smth)).scalar_one()
 
+    async def get_page(self,
+                       query: Select,
+                       page: int,
+                       size: int,
+                       cursor: Optional[str] = None,
+                       with_count: bool = False,
+                       profile: Optional[str] = None,
+                       fields: Optional[FieldSelection] = None) -> Page[T]:
+        """
+        Fetches one page of the query.
+        With with_count the total number of matching rows is fetched by the same statement
+        through a window count, so callers don't need a separate COUNT round trip.
+        With fields only the selected columns and relationships are loaded.
+        """
+        if not with_count:
+            select_smth = self.paginate(query, page, size, cursor).options(*self.load_options(profile, fields=fields))
+            result = (await self.session.execute(select_smth)).scalars().all()
+            return Page(items=result, next_cursor=self._next_cursor(result, size))
+
+        total_count = func.count().over().label("total_count")
+
+        if cursor is None:
+            select_smth = (
+                self.paginate(query.add_columns(total_count), page, size)
+                .options(*self.load_options(profile, fields=fields))
+            )
+        else:
+            # the seek condition must not narrow the window, so it's applied outside of it
+            counted = query.add_columns(total_count).subquery()
+            entity = aliased(self.model, counted)
+            select_smth = (
+                self.paginate(select(entity, counted.c.total_count), page, size, cursor, entity=entity)
+                .options(*self.load_options(profile, entity, fields))
+            )
+
+        rows = (await self.session.execute(select_smth)).all()
+        result = [row[0] for row in rows]
+
+        # an empty page (past the end) carries no window value
+        count = rows[0][1] if rows else await self.count(query)
+        return Page(items=result, next_cursor=self._next_cursor(result, size), count=count)
+
+    def _next_cursor(self, result: Sequence[T], size: int) -> Optional[str]:
+        return self.encode_cursor(result[-1]) if len(result) == size else None
+
+    async def get_all(self,
+                      page: int,
+                      size: int,
+                      cursor: Optional[str] = None,
+                      with_count: bool = False,
+                      profile: Optional[str] = None,
+                      fields: Optional[FieldSelection] = None):
         select_smth = (
             select(self.model)
         )
 
-        result = (await self.session.execute(select_smth)).scalars().all()
-        response = result[offset_min:offset_max]
+        return await self.get_page(select_smth, page, size, cursor, with_count, profile, fields)
+
+    async def stream(self,
+                     query: Select,
+                     chunk_size: int = 1000,
+                     profile: Optional[str] = None) -> AsyncIterator[Sequence[T]]:
+        """
+        Yields the rows of the query in keyset order, chunk_size objects at a time, through a server-side cursor,
+        so memory use doesn't grow with the result. Closing the generator closes the cursor.
+        """
+        select_smth = (
+            query
+            .order_by(*self.keyset())
+            .options(*self.load_options(profile))
+            .execution_options(yield_per=chunk_size)
+        )
+
+        result = await self.session.stream_scalars(select_smth)
+        try:
+            async for partition in result.partitions():
+                yield partition
+        finally:
+            await result.close()
 
-        return response
+    def stream_all(self,
+                   chunk_size: int = 1000,
+                   profile: Optional[str] = None) -> AsyncIterator[Sequence[T]]:
+        return self.stream(select(self.model), chunk_size, profile)
 
-    async def get_by_id(self, id: int):
+    async def get_by_id(self, id: int, profile: Optional[str] = None):
         select_smth = (
             select(self.model).filter_by(
                 id=id
             )
+            .options(*self.load_options(profile))
         )
 
         result = (await self.session.execute(select_smth)).scalar_one_or_none()
@@ -55,6 +267,22 @@ class BaseRepo(Generic[T, V]):
             raise ItemNotFoundByIdException(f'Object with id {id} not found')
         return result
 
+    async def get_by_ids(self, ids: Iterable[int], profile: Optional[str] = None) -> dict:
+        """Loads several objects in one query; returns them by id, missing ids are left out."""
+        ids = set(ids)
+        if not ids:
+            return {}
+
+        select_smth = (
+            select(self.model).where(
+                self.model.id.in_(ids)
+            )
+            .options(*self.load_options(profile))
+        )
+
+        result = (await self.session.execute(select_smth)).unique().scalars().all()
+        return {item.id: item for item in result}
+
     async def delete_by_id(self, id: int):
         query = (
             select(self.model).filter_by(
@@ -73,4 +301,35 @@ class BaseRepo(Generic[T, V]):
         )
 
         result = (await self.session.execute(select_smth)).scalar()
-        return result
\ No newline at end of file
+        return result
+
+    async def get_approximate_count(self) -> tuple[int, bool]:
+        """
+        Counts the rows of the table from the planner's statistics instead of scanning them.
+        Returns the count and whether it is an estimate: small tables, and tables the planner
+        has no estimate for, are counted exactly.
+        """
+        estimate = await self.estimate_table_count()
+        if estimate is None or estimate < APPROXIMATE_COUNT_THRESHOLD:
+            return await self.get_count(), False
+        return estimate, True
+
+    async def estimate_table_count(self) -> Optional[int]:
+        """
+        The number of rows in the model's table as the planner sees it: the tuple density of the last
+        ANALYZE scaled to the table's current size. None if the table was never analysed.
+        """
+        select_smth = text(
+            """
+            SELECT CASE
+                       WHEN relpages > 0
+                           THEN reltuples / relpages * (pg_relation_size(oid) / current_setting('block_size')::int)
+                       ELSE reltuples
+                   END
+            FROM pg_class
+            WHERE oid = to_regclass(quote_ident(:table_name)) AND reltuples >= 0
+            """
+        )
+
+        result = (await self.session.execute(select_smth, {"table_name": self.model.__tablename__})).scalar()
+        return None if result is None else int(result)
@@ -1,11 +1,132 @@
 import math
+import typing
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Optional, Type, Union
+
+import orjson
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from src.conditional import Validators, not_modified
+from src.repositories import Page
+from src.schemas import PaginatedResponseScheme
+
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+Dumper = Callable[[Any], Any]
+
+
+def _field_value(content: Any, name: str, default: Any) -> Any:
+    if isinstance(content, dict):
+        return content.get(name, default)
+    return getattr(content, name, default)
+
+
+def _dumper(annotation: Any) -> Optional[Dumper]:
+    """Converts values of the annotation into plain data; None where orjson takes the value as it is."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return dumper(annotation)
+
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is Union:
+        dumpers = [_dumper(arg) for arg in args if arg is not type(None)]
+        if all(dump is None for dump in dumpers):
+            return None
+        if len(dumpers) > 1:
+            raise TypeError(f"Can't render {annotation}: only Optional unions of one model are supported")
+        dump = dumpers[0]
+        return lambda value: None if value is None else dump(value)
+    if origin in (list, tuple, set, frozenset):
+        dump = _dumper(args[0]) if args else None
+        return list if dump is None else lambda values: [dump(value) for value in values]
+    if origin is dict:
+        dump = _dumper(args[1]) if args else None
+        return None if dump is None else lambda values: {key: dump(value) for key, value in values.items()}
+    # scalars: str (EmailStr too), numbers, enums, date and time values
+    return None
+
+
+@lru_cache(maxsize=1024)
+def dumper(scheme: Type[BaseModel]) -> Dumper:
+    """
+    Reads the fields of a scheme from content shaped like it (ORM objects, dataclasses, dicts or models)
+    into plain dicts and lists for orjson. There is one per scheme per process; bounded because sparse
+    fieldsets derive schemes from request parameters.
+    """
+    fields = [(name, None if field.is_required() else field.default, _dumper(field.annotation))
+              for name, field in scheme.model_fields.items()]
+
+    def dump(content: Any) -> dict:
+        data = {}
+        for name, default, dump_value in fields:
+            value = _field_value(content, name, default)
+            data[name] = value if dump_value is None or value is None else dump_value(value)
+        return data
+    return dump
+
+
+def serialize(scheme: Type[BaseModel], content: Any) -> bytes:
+    """
+    Dumps content into JSON shaped by the scheme without validating it. Responses are built from
+    stored rows and from what the route computed, which were validated on the way in; re-validating
+    every field (e.g. every EmailStr of a page) was most of the cost of a response.
+    """
+    return orjson.dumps(dumper(scheme)(content), option=ORJSON_OPTIONS)
+
+
+def json_response(scheme: Type[BaseModel], content: Any, headers: Optional[dict] = None) -> Response:
+    """
+    A ready JSON response. FastAPI passes returned Responses through untouched, so the route's response_model
+    only documents the body and the content is serialised once, here.
+    """
+    return Response(content=serialize(scheme, content), media_type="application/json", headers=headers)
+
+
+def paginated_response_content(result: Page,
+                               page: int,
+                               size: int,
+                               count: Optional[int] = None,
+                               approximate_count: bool = False):
+    if count is None:
+        count = result.count
 
-def paginated_response_content(result: list, page: int, size: int, count: int):
     total_pages = math.ceil(count / size)
     return {
-        "result": result,
+        "result": result.items,
         "page": page,
         "totalPages": total_pages,
         "size": size,
-        "count": count
+        "count": count,
+        "approximate_count": approximate_count,
+        "next_cursor": result.next_cursor
     }
+
+
+def paginated_response(scheme: Any,
+                       result: Page,
+                       page: int,
+                       size: int,
+                       count: Optional[int] = None,
+                       headers: Optional[dict] = None,
+                       approximate_count: bool = False) -> Response:
+    return json_response(PaginatedResponseScheme[scheme],
+                         paginated_response_content(result, page, size, count, approximate_count),
+                         headers)
+
+
+@dataclass
+class CachedResponse:
+    """A serialised JSON body together with the validators and headers it was sent with."""
+
+    body: bytes
+    validators: Validators
+    headers: dict
+    media_type: str = "application/json"
+
+    def respond(self, request: Request) -> Response:
+        if self.validators.matches(request):
+            return not_modified(self.headers)
+        return Response(content=self.body, media_type=self.media_type, headers=self.headers)
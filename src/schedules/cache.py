@@ -0,0 +1,40 @@
+from src.cache import TTLCache, ResponseCache
+from src.conditional import PUBLIC_CACHE_CONTROL, PRIVATE_CACHE_CONTROL
+from src.schedules.schemas import Schedule_Type
+
+WEEK_CACHE_SIZE = 1024
+WEEK_CACHE_TTL_SECONDS = 300
+
+CALENDAR_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# per worker process: a write invalidates only the worker that handled it,
+# the others serve their copy until it expires
+CALENDAR_CACHE_TTL_SECONDS = 300
+
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# per worker process, like the calendar cache; the TTL bounds how long other workers serve
+# a copy from before a write to what Cache-Control already allows clients
+RESPONSE_CACHE_TTL_SECONDS = 60
+
+# schedule id -> ((newest event updated_at, event count), etag, serialised week body); invalidation
+# only reaches the worker that handled a write, so readers check an entry against those validators
+week_cache: TTLCache[int, tuple[tuple, str, bytes]] = TTLCache(maxsize=WEEK_CACHE_SIZE, ttl=WEEK_CACHE_TTL_SECONDS)
+
+# (schedule id, "calendar") -> CachedResponse with the ICS feed; holds private schedules too,
+# access is checked before the cache is read
+calendar_cache = ResponseCache(max_bytes=CALENDAR_CACHE_MAX_BYTES, ttl=CALENDAR_CACHE_TTL_SECONDS)
+
+# (schedule id, view, ...) -> CachedResponse; only ever holds public schedules,
+# so a hit can be served to any authenticated user
+public_response_cache = ResponseCache(max_bytes=RESPONSE_CACHE_MAX_BYTES, ttl=RESPONSE_CACHE_TTL_SECONDS)
+
+
+def invalidate_schedule(schedule_id: int):
+    """Drops every cached view of a schedule; call it after any write that touches the schedule or its events."""
+    week_cache.invalidate(schedule_id)
+    public_response_cache.invalidate_group(schedule_id)
+    calendar_cache.invalidate_group(schedule_id)
+
+
+def schedule_cache_control(schedule) -> str:
+    """Public schedules may be stored by shared caches, everything else only by the client."""
+    return PUBLIC_CACHE_CONTROL if schedule.schedule_type == Schedule_Type.PUBLIC else PRIVATE_CACHE_CONTROL
@@ -0,0 +1,158 @@
+import datetime
+from typing import AsyncIterator, Callable, Optional
+
+import anyio
+import jwt
+from fastapi_users.jwt import generate_jwt, decode_jwt
+
+from src.auth.config import get_jwt_strategy
+from src.events.models import Event
+from src.events.repositories import EventsRepo
+from src.events.schemas import DayOfWeek
+from src.schedules.models import Schedule
+
+CALENDAR_MEDIA_TYPE = "text/calendar; charset=utf-8"
+CALENDAR_TOKEN_AUDIENCE = "scheduler:calendar"
+CALENDAR_CHUNK_SIZE = 500
+# bodies above this are streamed without being kept for the cache
+CALENDAR_MAX_CACHED_BYTES = 1024 * 1024
+
+PRODID = "-//scheduler-api//Schedule calendar//EN"
+
+BYDAY = {
+    DayOfWeek.MONDAY: "MO",
+    DayOfWeek.TUESDAY: "TU",
+    DayOfWeek.WEDNESDAY: "WE",
+    DayOfWeek.THURSDAY: "TH",
+    DayOfWeek.FRIDAY: "FR",
+    DayOfWeek.SATURDAY: "SA",
+    DayOfWeek.SUNDAY: "SU",
+}
+_WEEKDAYS = {day: weekday for weekday, day in enumerate(DayOfWeek)}
+
+
+def calendar_token(schedule_id: int, user_id: int, version: int) -> str:
+    """
+    A signed token that gives calendar apps, which can't send bearer headers, read access to one schedule's feed.
+    It is tied to the user it was issued to and stops working once that user loses access to the schedule
+    or is deactivated, and when the schedule's calendar tokens are reset (its token version moves on).
+    """
+    data = {"sub": str(user_id), "schedule_id": schedule_id, "ver": version, "aud": CALENDAR_TOKEN_AUDIENCE}
+    return generate_jwt(data, get_jwt_strategy().encode_key)
+
+
+def read_calendar_token(token: str) -> Optional[tuple[int, int, int]]:
+    """Returns (schedule_id, user_id, version) of a validly signed calendar token."""
+    try:
+        data = decode_jwt(token, get_jwt_strategy().decode_key, [CALENDAR_TOKEN_AUDIENCE])
+        return int(data["schedule_id"]), int(data["sub"]), int(data["ver"])
+    except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+        return None
+
+
+def escape_text(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def fold(line: str) -> str:
+    """Folds a content line into 75-octet pieces as RFC 5545 requires, never splitting a UTF-8 sequence."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+
+    pieces = []
+    start, limit = 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # step back from continuation bytes to the start of a character
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        pieces.append(encoded[start:end].decode())
+        start, limit = end, 74
+    return "\r\n ".join(pieces) + "\r\n"
+
+
+def first_occurrence(day_of_week: DayOfWeek, since: datetime.date) -> datetime.date:
+    return since + datetime.timedelta(days=(_WEEKDAYS[day_of_week] - since.weekday()) % 7)
+
+
+def _format_utc(value: datetime.datetime) -> str:
+    # timestamps are stored as naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_header(schedule: Schedule) -> str:
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN",
+             f"X-WR-CALNAME:{escape_text(schedule.name)}"]
+    return "".join(fold(line) for line in lines)
+
+
+def render_event(event: Event) -> str:
+    """
+    A weekly recurring VEVENT. Events have no date or time zone, so the series starts on the first
+    matching weekday since the event was created and uses floating (local) times.
+    """
+    start_date = first_occurrence(event.day_of_week, event.created_at.date())
+    start = datetime.datetime.combine(start_date, event.start_time)
+    end = datetime.datetime.combine(start_date, event.end_time)
+
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:event-{event.id}@scheduler-api",
+        f"DTSTAMP:{_format_utc(event.updated_at)}",
+        f"DTSTART:{start:%Y%m%dT%H%M%S}",
+        f"DTEND:{end:%Y%m%dT%H%M%S}",
+        f"RRULE:FREQ=WEEKLY;BYDAY={BYDAY[event.day_of_week]}",
+        f"SUMMARY:{escape_text(event.name)}",
+    ]
+    if event.description:
+        lines.append(f"DESCRIPTION:{escape_text(event.description)}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+FOOTER = "END:VCALENDAR\r\n"
+
+
+async def stream_calendar(schedule: Schedule,
+                          session_maker: Callable,
+                          on_complete: Optional[Callable[[bytes], None]] = None) -> AsyncIterator[bytes]:
+    """
+    Renders the feed of a schedule chunk by chunk. The session is opened here rather than taken from a
+    dependency, because dependency teardown runs before a streamed body is sent. When the feed is small
+    enough, the whole body is handed to on_complete once it has been sent, e.g. to cache it.
+    """
+    chunks: Optional[list[bytes]] = []
+    size = 0
+
+    def emit(text: str) -> bytes:
+        nonlocal chunks, size
+        chunk = text.encode()
+        if chunks is not None:
+            size += len(chunk)
+            if size <= CALENDAR_MAX_CACHED_BYTES:
+                chunks.append(chunk)
+            else:
+                chunks = None
+        return chunk
+
+    yield emit(render_header(schedule))
+
+    session = session_maker()
+    events = EventsRepo(session).stream_by_schedule_id(schedule.id, chunk_size=CALENDAR_CHUNK_SIZE)
+    try:
+        async for partition in events:
+            yield emit("".join(render_event(event) for event in partition))
+    finally:
+        # also runs when the client disconnects, so the cleanup itself must not be cancelled
+        with anyio.CancelScope(shield=True):
+            await events.aclose()
+            await session.close()
+
+    yield emit(FOOTER)
+
+    if on_complete is not None and chunks is not None:
+        on_complete(b"".join(chunks))
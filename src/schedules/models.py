@@ -1,6 +1,6 @@
 from typing import List
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.models import TimedBaseModel
@@ -8,23 +8,34 @@ from src.schedules.schemas import Schedule_Type
 
 
 class Schedule(TimedBaseModel):
+    __table_args__ = (
+        Index("ix_schedule_owner_id", "owner_id", "id"),
+        Index("ix_schedule_schedule_type", "schedule_type"),
+    )
+
     name:           Mapped[str] = mapped_column(nullable=False)
     description:    Mapped[str] = mapped_column(nullable=True)
     owner_id:       Mapped[int] = mapped_column(ForeignKey("user.id"))
     schedule_type:  Mapped["Schedule_Type"] = mapped_column(nullable=False, default=Schedule_Type.PRIVATE)
 
+    # maintained by database triggers on subscription and event (see the migration that added them),
+    # repaired by `python -m src.schedules.reconcile`
+    subscriber_count: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+    event_count:      Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+
+    # calendar tokens carry the version they were issued at; bumping it revokes all of them
+    calendar_token_version: Mapped[int] = mapped_column(nullable=False, default=0, server_default="0")
+
     owner:          Mapped["User"] = relationship(back_populates="schedules")
 
     events:         Mapped[List["Event"]] = relationship(
         back_populates="schedule",
-        lazy="selectin",
         cascade="all, delete-orphan"
     )
 
     subscribers: Mapped[List["User"]] = relationship(
         secondary="subscription",
-        back_populates="subscriptions",
-        lazy="selectin"
+        back_populates="subscriptions"
     )
 
     subscription_associations: Mapped[List["Subscription"]] = relationship(
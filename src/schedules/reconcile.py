@@ -0,0 +1,25 @@
+"""
+Repairs the subscriber_count and event_count of schedules by recounting their rows.
+
+The database triggers keep the counters exact; this is for after manual data fixes, restores
+or loads that ran with the triggers disabled. Running API processes pick the repaired counts up
+when their schedule caches expire.
+
+Usage: python -m src.schedules.reconcile [schedule_id ...]
+"""
+import asyncio
+import sys
+
+from src.schedules.repositories import ScheduleRepo
+from src.setup import async_session_maker
+
+
+async def main(schedule_ids):
+    async with async_session_maker() as session:
+        repaired = await ScheduleRepo(session).reconcile_counters(schedule_ids)
+
+    print(f"{len(repaired)} schedule(s) repaired" + (f": {', '.join(map(str, repaired))}" if repaired else ""))
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(argument) for argument in sys.argv[1:]] or None))
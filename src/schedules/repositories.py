@@ -1,44 +1,106 @@
-from sqlalchemy import select
+from typing import Optional, Iterable
+
+from sqlalchemy import select, func, update, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.events.models import Event
 from src.exceptions import ItemNotFoundByIdException
+from src.fields import FieldSelection
 from src.repositories import BaseRepo
 from src.schedules.models import Schedule
 from src.schedules.schemas import ScheduleCreate
+from src.subscriptions.models import Subscription
 
 
 class ScheduleRepo(BaseRepo[Schedule, ScheduleCreate]):
+    load_profiles = {
+        "schedule_with_owner": ("owner",),
+    }
+
     def __init__(self, session: AsyncSession):
         super().__init__(session, Schedule, ScheduleCreate)
 
     async def get_schedules_by_owner_id(self,
                                         owner_id: int,
                                         page: int,
-                                        size: int):
-        offset_min = page * size
-        offset_max = (page + 1) * size
-
+                                        size: int,
+                                        cursor: Optional[str] = None,
+                                        with_count: bool = False,
+                                        profile: Optional[str] = None,
+                                        fields: Optional[FieldSelection] = None):
         select_smth = (
             select(self.model).filter_by(
                 owner_id=owner_id
             )
         )
 
-        result = (await self.session.execute(select_smth)).scalars().all()
-        if not result:
-            raise []
-        response = result[offset_min:offset_max]
+        return await self.get_page(select_smth, page, size, cursor, with_count, profile, fields)
+
+    async def reconcile_counters(self, schedule_ids: Optional[Iterable[int]] = None) -> list[int]:
+        """
+        Recomputes subscriber_count and event_count from the subscription and event rows,
+        for the given schedules or all of them. Returns the ids of the schedules whose counters were off;
+        their updated_at is bumped too, so cached representations of them are revalidated.
+        """
+        subscriber_count = (
+            select(func.count(Subscription.id))
+            .where(Subscription.schedule_id == self.model.id)
+            .scalar_subquery()
+        )
+        event_count = (
+            select(func.count(Event.id))
+            .where(Event.schedule_id == self.model.id)
+            .scalar_subquery()
+        )
+
+        update_smth = (
+            update(self.model)
+            .where(or_(self.model.subscriber_count != subscriber_count, self.model.event_count != event_count))
+            .values(subscriber_count=subscriber_count, event_count=event_count)
+            .returning(self.model.id)
+        )
+        if schedule_ids is not None:
+            update_smth = update_smth.where(self.model.id.in_(list(schedule_ids)))
+
+        result = (await self.session.execute(update_smth)).scalars().all()
+        await self.session.commit()
+        return sorted(result)
 
-        return response
+    async def reset_calendar_tokens(self, schedule_id: int) -> Optional[int]:
+        """
+        Revokes every calendar token of a schedule by moving it to the next token version, which is returned
+        (None for an unknown schedule). updated_at is kept: no representation of the schedule changes.
+        """
+        update_smth = (
+            update(self.model)
+            .where(self.model.id == schedule_id)
+            .values(calendar_token_version=self.model.calendar_token_version + 1, updated_at=self.model.updated_at)
+            .returning(self.model.calendar_token_version)
+        )
+
+        result = (await self.session.execute(update_smth)).scalar_one_or_none()
+        await self.session.commit()
+        return result
+
+    async def get_validators_by_owner_id(self, owner_id: int):
+        """
+        Returns the newest updated_at, the number of schedules of an owner and the sums of their counters,
+        which change without touching updated_at.
+        """
+        select_smth = (
+            select(func.max(self.model.updated_at), func.count(self.model.id),
+                   func.sum(self.model.subscriber_count), func.sum(self.model.event_count)).filter_by(
+                owner_id=owner_id
+            )
+        )
+
+        return (await self.session.execute(select_smth)).one()
 
     async def get_schedule_count_by_owner_id(self, owner_id):
         select_smth = (
-            select(self.model).filter_by(
+            select(func.count(self.model.id)).filter_by(
                 owner_id=owner_id
             )
         )
 
-        result = (await self.session.execute(select_smth)).scalars().all()
-        if not result:
-            return 0
-        return len(result)
+        return (await self.session.execute(select_smth)).scalar_one()
@@ -1,22 +1,40 @@
+import csv
+import io
+import itertools
 import math
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.cache import Principal
 from src.auth.config import fastapi_users
 from src.events.repositories import EventsRepo
-from src.events.schemas import EventRead
+from src.conditional import strong_etag, etag_matches, not_modified, Validators
+from src.events.conflicts import find_conflicts
+from src.events.imports import ImportFormat, PARSERS
+from src.events.schemas import EventRead, ScheduleWeekRead, ScheduleConflictsRead, DayOfWeek, EventImportReport, \
+    EventImportError
 from src.exceptions import ItemNotFoundByIdException
-from src.dependencies import get_pagination_params, PaginationParams
-from src.responses import paginated_response_content
+from src.export import ExportResponse
+from src.fields import FieldSelection, sparse_scheme
+from src.dependencies import get_pagination_params, PaginationParams, get_fields, get_exact
+from src.responses import paginated_response, paginated_response_content, json_response, serialize, CachedResponse
+from src.schedules.cache import week_cache, public_response_cache, calendar_cache, invalidate_schedule, \
+    schedule_cache_control
+from src.schedules.calendar import CALENDAR_MEDIA_TYPE, calendar_token, read_calendar_token, stream_calendar
 from src.schedules.repositories import ScheduleRepo
 from src.schedules.schemas import ScheduleCreate, ScheduleWithOwnerRead, Schedule_Type
 from src.schemas import PaginatedResponseScheme
-from src.setup import get_async_session
+from src.setup import get_async_session, get_async_read_session, async_session_maker
 from src.subscriptions.repositories import SubscriptionRepo
 from src.subscriptions.schemas import SubscriberRead, SubscriptionCreate, Subscription_Type
-from src.users.models import User
+from src.users.repositories import UserRepo
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 100
 
 router = APIRouter(
     prefix="/schedules",
@@ -24,34 +42,56 @@ router = APIRouter(
 )
 
 current_user = fastapi_users.current_user()
+optional_current_user = fastapi_users.current_user(optional=True)
 
 
 @router.get("/", response_model=PaginatedResponseScheme[ScheduleWithOwnerRead])
-async def get_schedules(session: AsyncSession = Depends(get_async_session),
-                        user: User = Depends(current_user),
-                        pagination_params: PaginationParams = Depends(get_pagination_params)):
+async def get_schedules(session: AsyncSession = Depends(get_async_read_session),
+                        user: Principal = Depends(current_user),
+                        pagination_params: PaginationParams = Depends(get_pagination_params),
+                        fields: Optional[FieldSelection] = Depends(get_fields),
+                        exact: bool = Depends(get_exact)):
     if not user.is_superuser:
         raise HTTPException(status_code=403, detail="Only superusers can retrieve schedules using this endpoint")
 
+    scheme = sparse_scheme(ScheduleWithOwnerRead, fields)
     repo = ScheduleRepo(session)
 
-    count = await repo.get_count()
-    result = await repo.get_all(page=pagination_params.page, size=pagination_params.size)
+    if exact:
+        count, approximate_count = await repo.get_count(), False
+    else:
+        count, approximate_count = await repo.get_approximate_count()
+    result = await repo.get_all(page=pagination_params.page, size=pagination_params.size,
+                                cursor=pagination_params.cursor,
+                                profile="schedule_with_owner",
+                                fields=fields)
 
-    return paginated_response_content(result, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      count)
+    return paginated_response(scheme,
+                              result,
+                              pagination_params.page,
+                              pagination_params.size,
+                              count,
+                              approximate_count=approximate_count)
 
 
 @router.get("/{id}", response_model=ScheduleWithOwnerRead)
 async def get_schedule(id: int,
+                       request: Request,
+                       # public bodies are cached until the next write, so they're built from the primary
+                       # to never cache what a lagging replica returned
                        session: AsyncSession = Depends(get_async_session),
-                       user: User = Depends(current_user)):
+                       user: Principal = Depends(current_user)):
+    cache_key = (id, "schedule")
+    cached = public_response_cache.get(cache_key)
+    if cached is not None:
+        return cached.respond(request)
+
+    # read before loading, so a write committed during the fill keeps its stale body out of the cache
+    generation = public_response_cache.invalidations
     try:
         repo = ScheduleRepo(session)
 
-        result = await repo.get_by_id(id)
+        result = await repo.get_by_id(id, profile="schedule_with_owner")
 
         if (result
                 and not user.is_superuser
@@ -60,15 +100,42 @@ async def get_schedule(id: int,
             raise HTTPException(status_code=403,
                                 detail="Only superusers or schedule owner can retrieve schedules. You are none of them")
 
-        return result
+        last_modified = max(result.updated_at, result.owner.updated_at)
+        # the counters change without touching updated_at
+        validators = Validators.from_state("schedule", result.id, last_modified, result.subscriber_count,
+                                           result.event_count, last_modified=last_modified)
+        headers = validators.headers(schedule_cache_control(result))
+        if result.schedule_type == Schedule_Type.PUBLIC:
+            body = serialize(ScheduleWithOwnerRead, result)
+            cached = CachedResponse(body=body, validators=validators, headers=headers)
+            public_response_cache.set(cache_key, cached, size=len(body), generation=generation)
+            return cached.respond(request)
+
+        if validators.matches(request):
+            return not_modified(headers)
+
+        return json_response(ScheduleWithOwnerRead, result, headers)
     except ItemNotFoundByIdException:
         raise HTTPException(status_code=404, detail="Schedule not found")
 
 
 @router.get("/{id}/events", response_model=PaginatedResponseScheme[EventRead])
-async def get_events_of_schedule(id: int, session: AsyncSession = Depends(get_async_session),
-                                 user: User = Depends(current_user),
-                                 pagination_params: PaginationParams = Depends(get_pagination_params)):
+async def get_events_of_schedule(id: int,
+                                 request: Request,
+                                 # public pages are cached until the next event write, so they're built
+                                 # from the primary to never cache what a lagging replica returned
+                                 session: AsyncSession = Depends(get_async_session),
+                                 user: Principal = Depends(current_user),
+                                 pagination_params: PaginationParams = Depends(get_pagination_params),
+                                 fields: Optional[FieldSelection] = Depends(get_fields)):
+    scheme = sparse_scheme(EventRead, fields)
+    cache_key = (id, "events", pagination_params.page, pagination_params.size, pagination_params.cursor, fields)
+    cached = public_response_cache.get(cache_key)
+    if cached is not None:
+        return cached.respond(request)
+
+    generation = public_response_cache.invalidations
+
     try:
         schedule = await ScheduleRepo(session).get_by_id(id)
 
@@ -84,21 +151,302 @@ async def get_events_of_schedule(id: int, session: AsyncSession = Depends(get_as
 
     repo = EventsRepo(session)
 
-    events_count = await repo.get_events_count_by_schedule_id(schedule_id=id)
+    last_modified, _ = await repo.get_validators_by_schedule_id(schedule_id=id)
+    validators = Validators.from_state("events", *cache_key, last_modified, schedule.event_count)
+    headers = validators.headers(schedule_cache_control(schedule))
+    public = schedule.schedule_type == Schedule_Type.PUBLIC
+    if not public and validators.matches(request):
+        return not_modified(headers)
+
     events = await repo.get_all_by_schedule_id(schedule_id=id, 
                                                page=pagination_params.page, 
-                                               size=pagination_params.size)
+                                               size=pagination_params.size,
+                                               cursor=pagination_params.cursor,
+                                               fields=fields)
+
+    content = paginated_response_content(events, 
+                                         pagination_params.page, 
+                                         pagination_params.size,
+                                         schedule.event_count)
+
+    body = serialize(PaginatedResponseScheme[scheme], content)
+    if public:
+        cached = CachedResponse(body=body, validators=validators, headers=headers)
+        public_response_cache.set(cache_key, cached, size=len(body), generation=generation)
+        return cached.respond(request)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{id}/week", response_model=ScheduleWeekRead)
+async def get_week_of_schedule(id: int,
+                               request: Request,
+                               # the body is cached until the next event write, so it's built from the primary
+                               # to never cache what a lagging replica returned
+                               session: AsyncSession = Depends(get_async_session),
+                               user: Principal = Depends(current_user)):
+    try:
+        schedule = await ScheduleRepo(session).get_by_id(id)
+
+        if (schedule
+                and not user.is_superuser
+                and schedule.owner_id != user.id
+                and schedule.schedule_type == Schedule_Type.PRIVATE):
+            raise HTTPException(status_code=403,
+                                detail="Only superusers or schedule owner can retrieve schedules. You are none of them")
+
+    except ItemNotFoundByIdException:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    repo = EventsRepo(session)
+    # the cache is per process and a write only invalidates the worker that handled it,
+    # so an entry is used only while the events it was built from are unchanged
+    state = tuple(await repo.get_validators_by_schedule_id(schedule_id=id))
+    cached = week_cache.get(id)
+    if cached is None or cached[0] != state:
+        days = {day: [] for day in DayOfWeek}
+        for event in await repo.get_week_by_schedule_id(schedule_id=id):
+            days[event.day_of_week].append(event)
+
+        body = serialize(ScheduleWeekRead, {"schedule_id": id, "days": days})
+        cached = (state, strong_etag(body), body)
+        week_cache.set(id, cached)
+
+    _, etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": schedule_cache_control(schedule)}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{id}/conflicts", response_model=ScheduleConflictsRead)
+async def get_conflicts_of_schedule(id: int,
+                                    session: AsyncSession = Depends(get_async_read_session),
+                                    user: Principal = Depends(current_user)):
+    try:
+        schedule = await ScheduleRepo(session).get_by_id(id)
+
+        if (schedule
+                and not user.is_superuser
+                and schedule.owner_id != user.id
+                and schedule.schedule_type == Schedule_Type.PRIVATE):
+            raise HTTPException(status_code=403,
+                                detail="Only superusers or schedule owner can retrieve schedules. You are none of them")
+
+    except ItemNotFoundByIdException:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    intervals = await EventsRepo(session).get_intervals_by_schedule_id(schedule_id=id)
+
+    return json_response(ScheduleConflictsRead, {"schedule_id": id, "conflicts": find_conflicts(intervals)})
+
+
+@router.get("/{id}/calendar_token")
+async def get_calendar_token_of_schedule(id: int,
+                                         request: Request,
+                                         # a lagging replica could still hold the token version of before a reset
+                                         session: AsyncSession = Depends(get_async_session),
+                                         user: Principal = Depends(current_user)):
+    try:
+        schedule = await ScheduleRepo(session).get_by_id(id)
+
+        if (schedule
+                and not user.is_superuser
+                and schedule.owner_id != user.id
+                and schedule.schedule_type == Schedule_Type.PRIVATE):
+            raise HTTPException(status_code=403,
+                                detail="Only superusers or schedule owner can retrieve schedules. You are none of them")
+
+    except ItemNotFoundByIdException:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    return calendar_token_response(request, id, user.id, schedule.calendar_token_version)
+
+
+@router.post("/{id}/calendar_token/reset")
+async def reset_calendar_tokens_of_schedule(id: int,
+                                            request: Request,
+                                            session: AsyncSession = Depends(get_async_session),
+                                            user: Principal = Depends(current_user)):
+    """Revokes every calendar token issued for the schedule, e.g. after a feed URL leaked, and issues a new one."""
+    repo = ScheduleRepo(session)
+    try:
+        schedule = await repo.get_by_id(id)
+    except ItemNotFoundByIdException:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    if not user.is_superuser and schedule.owner_id != user.id:
+        raise HTTPException(status_code=403,
+                            detail="Only superusers or schedule owner can reset calendar tokens. You are none of them")
+
+    version = await repo.reset_calendar_tokens(id)
+    return calendar_token_response(request, id, user.id, version)
+
+
+def calendar_token_response(request: Request, schedule_id: int, user_id: int, version: int) -> dict:
+    token = calendar_token(schedule_id=schedule_id, user_id=user_id, version=version)
+    url = request.url_for("get_calendar_of_schedule", id=schedule_id).include_query_params(token=token)
+    return {"token": token, "url": str(url)}
+
+
+async def can_read_calendar(session: AsyncSession, schedule, user: Optional[Principal], token: Optional[str]) -> bool:
+    """
+    Public feeds are open to anyone. Private ones need an active owner or superuser, by bearer header
+    or by a calendar token of the schedule's current token version.
+    """
+    if schedule.schedule_type == Schedule_Type.PUBLIC:
+        return True
+    if user is not None and user.is_active and (user.is_superuser or schedule.owner_id == user.id):
+        return True
+    if token is None:
+        return False
+
+    claims = read_calendar_token(token)
+    if claims is None:
+        return False
+    schedule_id, token_user_id, version = claims
+    if schedule_id != schedule.id or version != schedule.calendar_token_version:
+        return False
 
-    return paginated_response_content(events, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      events_count)
+    try:
+        token_user = await UserRepo(session).get_by_id(token_user_id)
+    except ItemNotFoundByIdException:
+        return False
+    return token_user.is_active and (token_user.is_superuser or token_user.id == schedule.owner_id)
+
+
+@router.get("/{id}/calendar.ics")
+async def get_calendar_of_schedule(id: int,
+                                   request: Request,
+                                   token: Optional[str] = Query(default=None),
+                                   # the feed is cached until the next event write, so it's built from the primary
+                                   session: AsyncSession = Depends(get_async_session),
+                                   user: Optional[Principal] = Depends(optional_current_user)):
+    """
+    The schedule as an iCalendar feed for calendar apps. Unlike every other read endpoint it needs no
+    authentication for public schedules; private ones take a bearer header or the ?token= of
+    /schedules/{id}/calendar_token.
+    """
+    try:
+        schedule = await ScheduleRepo(session).get_by_id(id)
+    except ItemNotFoundByIdException:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    if not await can_read_calendar(session, schedule, user, token):
+        raise HTTPException(status_code=403,
+                            detail="Private calendars need a calendar token of the schedule owner or a superuser")
+
+    cache_key = (id, "calendar")
+    cached = calendar_cache.get(cache_key)
+    if cached is not None:
+        return cached.respond(request)
+
+    generation = calendar_cache.invalidations
+    last_modified, count = await EventsRepo(session).get_validators_by_schedule_id(schedule_id=id)
+    validators = Validators.from_state("calendar", id, schedule.updated_at, last_modified, count)
+    headers = validators.headers(schedule_cache_control(schedule))
+    if validators.matches(request):
+        return not_modified(headers)
+
+    def store(body: bytes):
+        cached = CachedResponse(body=body, validators=validators, headers=headers, media_type=CALENDAR_MEDIA_TYPE)
+        calendar_cache.set(cache_key, cached, size=len(body), generation=generation)
+
+    return ExportResponse(stream_calendar(schedule, async_session_maker, on_complete=store),
+                          media_type=CALENDAR_MEDIA_TYPE,
+                          headers=headers)
+
+
+def detect_import_format(file: UploadFile) -> Optional[ImportFormat]:
+    filename = (file.filename or "").lower()
+    content_type = (file.content_type or "").lower()
+    if filename.endswith((".ics", ".ical")) or content_type.startswith("text/calendar"):
+        return ImportFormat.ICS
+    if filename.endswith(".csv") or content_type.startswith("text/csv"):
+        return ImportFormat.CSV
+    return None
+
+
+@router.post("/{id}/import", response_model=EventImportReport)
+async def import_events_into_schedule(id: int,
+                                      file: UploadFile,
+                                      import_format: Optional[ImportFormat] = Query(default=None, alias="format"),
+                                      session: AsyncSession = Depends(get_async_session),
+                                      user: Principal = Depends(current_user)):
+    """
+    Imports the events of an .ics or .csv file. The file is parsed as a stream and inserted in batches
+    of IMPORT_BATCH_SIZE rows within one transaction; rejected entries are reported by line.
+    """
+    try:
+        schedule = await ScheduleRepo(session).get_by_id(id)
+
+        if not user.is_superuser and schedule.owner_id != user.id:
+            raise HTTPException(status_code=403,
+                                detail="Only superusers or schedule owner can add events. You are none of them")
+    except ItemNotFoundByIdException:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    import_format = import_format or detect_import_format(file)
+    if import_format is None:
+        raise HTTPException(status_code=415, detail="Upload an .ics or .csv file or pass ?format=ics|csv")
+
+    repo = EventsRepo(session)
+    await repo.lock_schedules([id])
+    index = await repo.get_interval_index([id])
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    rows = PARSERS[import_format](stream, schedule_id=id)
+    report = EventImportReport()
+
+    def fail(line: int, detail: str):
+        report.failed += 1
+        if len(report.errors) < IMPORT_MAX_ERRORS:
+            report.errors.append(EventImportError(line=line, detail=detail))
+        else:
+            report.errors_truncated = True
+
+    try:
+        # parsing is blocking file I/O and CPU work, so it runs in the threadpool one batch at a time
+        while batch := await run_in_threadpool(lambda: list(itertools.islice(rows, IMPORT_BATCH_SIZE))):
+            events = []
+            for row in batch:
+                report.processed += 1
+                if row.error is not None:
+                    fail(row.line, row.error)
+                    continue
+
+                overlap = repo.check_overlap(index, row.event, owner=f"Event overlaps the event on line {row.line}")
+                if overlap is not None:
+                    fail(row.line, str(overlap))
+                    continue
+                events.append(row.event)
+
+            await repo.insert_many(events)
+            report.created += len(events)
+            report.batches += 1
+
+        await session.commit()
+    except (UnicodeDecodeError, csv.Error) as e:
+        await session.rollback()
+        raise HTTPException(status_code=422, detail=f"File can't be parsed: {e}")
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        # the upload is closed by the framework, not by the wrapper
+        stream.detach()
+
+    invalidate_schedule(id)
+    return report
 
 
 @router.get("/{id}/subscribers", response_model=PaginatedResponseScheme[SubscriberRead])
-async def get_subscribers_of_schedule(id: int, session: AsyncSession = Depends(get_async_session),
-                                      user: User = Depends(current_user),
-                                      pagination_params: PaginationParams = Depends(get_pagination_params)):
+async def get_subscribers_of_schedule(id: int, session: AsyncSession = Depends(get_async_read_session),
+                                      user: Principal = Depends(current_user),
+                                      pagination_params: PaginationParams = Depends(get_pagination_params),
+                                      fields: Optional[FieldSelection] = Depends(get_fields)):
+    scheme = sparse_scheme(SubscriberRead, fields)
     try:
         schedule = await ScheduleRepo(session).get_by_id(id)
 
@@ -110,21 +458,24 @@ async def get_subscribers_of_schedule(id: int, session: AsyncSession = Depends(g
 
     repo = SubscriptionRepo(session)
 
-    subscription_count = await repo.get_subscription_count_by_schedule_id(schedule_id=id)
     result = await repo.get_subscriptions_by_schedule_id(schedule_id=id, 
                                                           page=pagination_params.page, 
-                                                          size=pagination_params.size)
+                                                          size=pagination_params.size,
+                                                          cursor=pagination_params.cursor,
+                                                          profile="subscription_with_subscriber",
+                                                          fields=fields)
 
-    return paginated_response_content(result, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      subscription_count)
+    return paginated_response(scheme,
+                              result,
+                              pagination_params.page,
+                              pagination_params.size,
+                              schedule.subscriber_count)
 
 
 @router.post("/")
 async def create_schedule(new_schedule: ScheduleCreate,
                           session: AsyncSession = Depends(get_async_session),
-                          user: User = Depends(current_user)):
+                          user: Principal = Depends(current_user)):
     if not user.is_superuser:
         raise HTTPException(status_code=403, detail="Only superusers can create schedules using this endpoint")
 
@@ -151,7 +502,7 @@ async def create_schedule(new_schedule: ScheduleCreate,
 @router.delete("/{id}")
 async def delete_schedule(id: int,
                           session: AsyncSession = Depends(get_async_session),
-                          user: User = Depends(current_user)):
+                          user: Principal = Depends(current_user)):
     repo = ScheduleRepo(session)
     try:
         schedule = await repo.get_by_id(id)
@@ -163,4 +514,5 @@ async def delete_schedule(id: int,
         raise HTTPException(status_code=404, detail="Schedule not found")
 
     await repo.delete_by_id(id)
+    invalidate_schedule(id)
     return {"status": "success"}
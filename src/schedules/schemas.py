@@ -21,6 +21,9 @@ class ScheduleCreate(ScheduleBase):
 
 class ScheduleRead(ScheduleBase, TimedBaseScheme):
     id: int
+    # every subscription, the owner's included
+    subscriber_count: int = 0
+    event_count: int = 0
 
 
 from src.users.schemas import UserRead
@@ -1,7 +1,7 @@
 import datetime
 from typing import Optional, List, Generic, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 M = TypeVar('M')
 
@@ -23,3 +23,14 @@ class PaginatedResponseScheme(BaseScheme, Generic[M]):
     totalPages: Optional[int] = 0
     size: Optional[int] = 10
     count: Optional[int] = 0
+    # set when count (and so totalPages) is the planner's estimate rather than an exact count
+    approximate_count: bool = False
+    next_cursor: Optional[str] = None
+
+
+def validation_error_detail(error: ValidationError) -> str:
+    """The errors of a validation as one line, e.g. "start_time: Input should be a valid time"."""
+    # errors of the whole model (e.g. inverted event times) have no field to point at
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors())
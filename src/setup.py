@@ -5,16 +5,39 @@ from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from .config import DbConfig
+from src.pool import InstrumentedQueuePool
+from src.replicas import read_session_maker
 from src.users.models import User
 
-engine = create_async_engine(DbConfig.from_env().construct_sqlalchemy_url())
+db_config = DbConfig.from_env()
+
+engine = create_async_engine(db_config.construct_sqlalchemy_url(),
+                             poolclass=InstrumentedQueuePool,
+                             **db_config.construct_engine_options())
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engines = [
+    create_async_engine(url, poolclass=InstrumentedQueuePool, **db_config.construct_engine_options())
+    for url in db_config.construct_replica_urls()
+]
+
+# without replicas, reads simply go to the primary
+async_read_session_maker = read_session_maker(replica_engines, db_config.replica_balancing, async_session_maker)
+
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
 
 
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only GET handlers, served by a read replica when any are configured.
+    Writes and reads that must see the request's own writes have to use get_async_session.
+    """
+    async with async_read_session_maker() as session:
+        yield session
+
+
 async def get_db(session: AsyncSession = Depends(get_async_session)):
     yield SQLAlchemyUserDatabase(session, User)
\ No newline at end of file
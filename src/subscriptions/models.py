@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
 from src.models import TimedBaseModel
@@ -6,6 +6,13 @@ from src.subscriptions.schemas import Subscription_Type
 
 
 class Subscription(TimedBaseModel):
+    __table_args__ = (
+        # a user subscribes to a schedule at most once; inserts rely on it for ON CONFLICT DO NOTHING
+        UniqueConstraint("subscriber_id", "schedule_id", name="uq_subscription_subscriber_id_schedule_id"),
+        Index("ix_subscription_subscriber_id_subscription_type", "subscriber_id", "subscription_type", "id"),
+        Index("ix_subscription_schedule_id", "schedule_id", "id"),
+    )
+
     subscriber_id: Mapped[int] = mapped_column(
         ForeignKey("user.id", ondelete="CASCADE"),
         nullable=False,
@@ -19,7 +26,7 @@ class Subscription(TimedBaseModel):
     subscription_type: Mapped["Subscription_Type"] = mapped_column(nullable=False, default=Subscription_Type.FOLLOWER)
 
     # association between Subscription -> Subscriber
-    subscriber: Mapped["User"] = relationship(back_populates="subscription_associations", lazy="selectin")
+    subscriber: Mapped["User"] = relationship(back_populates="subscription_associations")
 
     # association between Subscription -> Schedule
-    schedule: Mapped["Schedule"] = relationship(back_populates="subscription_associations", lazy="selectin")
\ No newline at end of file
+    schedule: Mapped["Schedule"] = relationship(back_populates="subscription_associations")
\ No newline at end of file
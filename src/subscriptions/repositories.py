@@ -1,39 +1,90 @@
-from sqlalchemy import select
+from typing import Optional, Iterable
+
+from sqlalchemy import select, func, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.exceptions import ItemNotFoundByIdException
+from src.fields import FieldSelection
 from src.repositories import BaseRepo
+from src.schedules.models import Schedule
 from src.subscriptions.models import Subscription
 from src.subscriptions.schemas import SubscriptionCreate, Subscription_Type
 
 
 class SubscriptionRepo(BaseRepo[Subscription, SubscriptionCreate]):
+    load_profiles = {
+        "subscription": ("subscriber", "schedule"),
+        "subscription_with_subscriber": ("subscriber",),
+        "subscription_with_schedule": ("schedule",),
+    }
+
     def __init__(self, session: AsyncSession):
         super().__init__(session, Subscription, SubscriptionCreate)
 
-    async def get_subscriptions_by_schedule_id(self, schedule_id: int, page: int, size: int):
-        offset_min = page * size
-        offset_max = (page + 1) * size
+    async def create_followers(self, subscriber_id: int, schedule_ids: Iterable[int]) -> list[int]:
+        """
+        Subscribes a user to several schedules as a follower in a single statement.
+        Existing subscriptions are left untouched; returns the ids of the schedules that were newly followed.
+        """
+        values = [
+            {"subscriber_id": subscriber_id, "schedule_id": schedule_id,
+             "subscription_type": Subscription_Type.FOLLOWER}
+            for schedule_id in schedule_ids
+        ]
+        if not values:
+            return []
+
+        create_smth = (
+            insert(self.model)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=[self.model.subscriber_id, self.model.schedule_id])
+            .returning(self.model.schedule_id)
+        )
+
+        result = (await self.session.execute(create_smth)).scalars().all()
+        await self.session.commit()
+        return list(result)
+
+    async def delete_followers(self, subscriber_id: int, schedule_ids: Iterable[int]) -> list[int]:
+        """Unsubscribes a follower from several schedules; returns the ids of the schedules that were unfollowed."""
+        delete_smth = (
+            delete(self.model)
+            .where(self.model.subscriber_id == subscriber_id,
+                   self.model.schedule_id.in_(list(schedule_ids)),
+                   self.model.subscription_type == Subscription_Type.FOLLOWER)
+            .returning(self.model.schedule_id)
+        )
 
+        result = (await self.session.execute(delete_smth)).scalars().all()
+        await self.session.commit()
+        return list(result)
+
+    async def get_subscriptions_by_schedule_id(self,
+                                               schedule_id: int,
+                                               page: int,
+                                               size: int,
+                                               cursor: Optional[str] = None,
+                                               with_count: bool = False,
+                                               profile: Optional[str] = None,
+                                               fields: Optional[FieldSelection] = None):
         select_smth = (
             select(self.model).filter_by(
                 schedule_id=schedule_id
             )
         )
 
-        result = (await self.session.execute(select_smth)).scalars().all()
-        if not result:
-            return []
-        return result[offset_min:offset_max]
+        return await self.get_page(select_smth, page, size, cursor, with_count, profile, fields)
 
     async def get_subscriptions_by_subscriber_id(self,
                                                  subscriber_id: int,
                                                  page: int,
                                                  size: int,
-                                                 subscription_type: Subscription_Type = None):
-        offset_min = page * size
-        offset_max = (page + 1) * size
-
+                                                 subscription_type: Subscription_Type = None,
+                                                 cursor: Optional[str] = None,
+                                                 with_count: bool = False,
+                                                 profile: Optional[str] = None,
+                                                 fields: Optional[FieldSelection] = None):
         select_smth = (
             select(self.model).filter_by(
                 subscriber_id=subscriber_id
@@ -43,43 +94,50 @@ class SubscriptionRepo(BaseRepo[Subscription, SubscriptionCreate]):
         if subscription_type:
             select_smth = select_smth.filter_by(subscription_type=subscription_type)
 
-        result = (await self.session.execute(select_smth)).scalars().all()
-        if not result:
-            return []
-        return result[offset_min:offset_max]
+        return await self.get_page(select_smth, page, size, cursor, with_count, profile, fields)
+
+    async def get_validators_by_subscriber_id(self,
+                                              subscriber_id: int,
+                                              subscription_type: Subscription_Type = None):
+        """
+        Returns the newest updated_at of the subscriptions, the newest updated_at of their schedules,
+        the number of subscriptions of a subscriber and the sums of the schedules' counters.
+        """
+        select_smth = (
+            select(func.max(self.model.updated_at), func.max(Schedule.updated_at), func.count(self.model.id),
+                   func.sum(Schedule.subscriber_count), func.sum(Schedule.event_count))
+            .join(Schedule, Schedule.id == self.model.schedule_id)
+            .where(self.model.subscriber_id == subscriber_id)
+        )
+
+        if subscription_type:
+            select_smth = select_smth.where(self.model.subscription_type == subscription_type)
+
+        return (await self.session.execute(select_smth)).one()
 
     async def get_subscription_count_by_subscriber_id(self, subscriber_id):
         select_smth = (
-            select(self.model).filter_by(
+            select(func.count(self.model.id)).filter_by(
                 subscriber_id=subscriber_id
             )
         )
 
-        result = (await self.session.execute(select_smth)).scalars().all()
-        if not result:
-            return 0
-        return len(result)
+        return (await self.session.execute(select_smth)).scalar_one()
 
     async def get_subscription_count_by_schedule_id(self, schedule_id):
         select_smth = (
-            select(self.model).filter_by(
+            select(func.count(self.model.id)).filter_by(
                 schedule_id=schedule_id
             )
         )
 
-        result = (await self.session.execute(select_smth)).scalars().all()
-        if not result:
-            return 0
-        return len(result)
+        return (await self.session.execute(select_smth)).scalar_one()
 
     async def get_subscription_count_by_owner_id(self, owner_id):
         select_smth = (
-            select(self.model).filter_by(
-                owner_id=owner_id
-            )
+            select(func.count(self.model.id))
+            .join(Schedule, Schedule.id == self.model.schedule_id)
+            .where(Schedule.owner_id == owner_id)
         )
 
-        result = (await self.session.execute(select_smth)).scalars().all()
-        if not result:
-            return 0
-        return len(result)
+        return (await self.session.execute(select_smth)).scalar_one()
@@ -1,18 +1,22 @@
 import math
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.cache import Principal
 from src.auth.config import fastapi_users
+from src.export import ExportFormat, export_response
 from src.exceptions import ItemNotFoundByIdException
-from src.dependencies import get_pagination_params, PaginationParams
-from src.responses import paginated_response_content
+from src.dependencies import get_pagination_params, PaginationParams, get_fields, get_exact
+from src.fields import FieldSelection, sparse_scheme
+from src.responses import paginated_response, json_response
+from src.schedules.cache import invalidate_schedule
 from src.schemas import PaginatedResponseScheme
-from src.setup import get_async_session
+from src.setup import get_async_session, get_async_read_session
 from src.subscriptions.repositories import SubscriptionRepo
 from src.subscriptions.schemas import SubscriptionCreate, SubscriptionRead, Subscription_Type
-from src.users.models import User
 
 router = APIRouter(
     prefix="/subscriptions",
@@ -23,38 +27,59 @@ current_user = fastapi_users.current_user()
 
 
 @router.get("/", response_model=PaginatedResponseScheme[SubscriptionRead])
-async def get_subscriptions(session: AsyncSession = Depends(get_async_session),
-                            user: User = Depends(current_user),
-                            pagination_params: PaginationParams = Depends(get_pagination_params)):
+async def get_subscriptions(session: AsyncSession = Depends(get_async_read_session),
+                            user: Principal = Depends(current_user),
+                            pagination_params: PaginationParams = Depends(get_pagination_params),
+                            fields: Optional[FieldSelection] = Depends(get_fields),
+                            exact: bool = Depends(get_exact)):
     if not user.is_superuser:
         raise HTTPException(status_code=403, detail="Only superusers can retrieve subscriptions using this endpoint")
 
+    scheme = sparse_scheme(SubscriptionRead, fields)
     repo = SubscriptionRepo(session)
 
-    count = await repo.get_count()
-    result = await repo.get_all(page=pagination_params.page, size=pagination_params.size)
+    if exact:
+        count, approximate_count = await repo.get_count(), False
+    else:
+        count, approximate_count = await repo.get_approximate_count()
+    result = await repo.get_all(page=pagination_params.page, size=pagination_params.size,
+                                cursor=pagination_params.cursor,
+                                profile="subscription",
+                                fields=fields)
+
+    return paginated_response(scheme,
+                              result,
+                              pagination_params.page,
+                              pagination_params.size,
+                              count,
+                              approximate_count=approximate_count)
+
+
+@router.get("/export")
+async def export_subscriptions(user: Principal = Depends(current_user),
+                               export_format: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format")):
+    if not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Only superusers can export subscriptions using this endpoint")
 
-    return paginated_response_content(result, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      count)
+    return export_response(SubscriptionRepo, SubscriptionRead, export_format, filename="subscriptions",
+                           profile="subscription")
 
 
 @router.get("/{id}", response_model=SubscriptionRead)
 async def get_subscription(id: int,
-                           session: AsyncSession = Depends(get_async_session),
-                           user: User = Depends(current_user)):
+                           session: AsyncSession = Depends(get_async_read_session),
+                           user: Principal = Depends(current_user)):
     try:
         repo = SubscriptionRepo(session)
 
-        result = await repo.get_by_id(id)
+        result = await repo.get_by_id(id, profile="subscription")
 
         if result and not user.is_superuser and result.subscriber_id != user.id:
             raise HTTPException(status_code=403,
                                 detail="Only superusers or schedule subscriber can retrieve schedules. You are none "
                                        "of them")
 
-        return result
+        return json_response(SubscriptionRead, result)
     except ItemNotFoundByIdException:
         return []
 
@@ -62,7 +87,7 @@ async def get_subscription(id: int,
 @router.post("/")
 async def create_subscription(new_schedule: SubscriptionCreate,
                               session: AsyncSession = Depends(get_async_session),
-                              user: User = Depends(current_user)):
+                              user: Principal = Depends(current_user)):
     if not user.is_superuser:
         raise HTTPException(status_code=403, detail="Only superusers can retrieve subscriptions using this endpoint")
 
@@ -70,6 +95,7 @@ async def create_subscription(new_schedule: SubscriptionCreate,
         repo = SubscriptionRepo(session)
 
         await repo.create(new_schedule)
+        invalidate_schedule(new_schedule.schedule_id)
         return {"status": "success"}
     except IntegrityError:
         raise HTTPException(status_code=404, detail="Entry by specified foreign key/id doesn't exists")
@@ -78,7 +104,7 @@ async def create_subscription(new_schedule: SubscriptionCreate,
 @router.delete("/{id}")
 async def delete_subscription(id: int,
                               session: AsyncSession = Depends(get_async_session),
-                              user: User = Depends(current_user)):
+                              user: Principal = Depends(current_user)):
     repo = SubscriptionRepo(session)
 
     subscription = await repo.get_by_id(id)
@@ -91,4 +117,5 @@ async def delete_subscription(id: int,
                             detail="Only superusers or schedule follower can use this endpoint.You are none of them")
 
     await repo.delete_by_id(id)
+    invalidate_schedule(subscription.schedule_id)
     return {"status": "success"}
@@ -1,4 +1,7 @@
 import enum
+from typing import List
+
+from pydantic import Field
 
 from src.schemas import TimedBaseScheme, BaseScheme
 
@@ -39,4 +42,20 @@ class SubscriptionScheduleRead(SubscriptionBase, TimedBaseScheme):
 
 
 class SubscriptionRead(SubscriberRead, SubscriptionScheduleRead):
-    pass
\ No newline at end of file
+    pass
+
+
+class SubscriptionBulkCreate(BaseScheme):
+    schedule_ids: List[int] = Field(max_length=1000)
+
+
+class SubscriptionBulkError(BaseScheme):
+    schedule_id: int
+    status_code: int
+    detail: str
+
+
+class SubscriptionBulkResult(BaseScheme):
+    # schedules the user follows after the request, whether the subscription is new or not
+    schedule_ids: List[int]
+    errors: List[SubscriptionBulkError] = []
@@ -13,14 +13,12 @@ class User(SQLAlchemyBaseUserTable[int], TimedBaseModel):
 
     schedules: Mapped[List["Schedule"]] = relationship(
         back_populates="owner",
-        lazy="selectin",
         cascade="all, delete-orphan"
     )
 
     subscriptions: Mapped[List["Schedule"]] = relationship(
         secondary="subscription",
-        back_populates="subscribers",
-        lazy="selectin"
+        back_populates="subscribers"
     )
 
     subscription_associations: Mapped[List["Subscription"]] = relationship(
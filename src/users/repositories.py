@@ -1,5 +1,8 @@
+from sqlalchemy import select, union
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.schedules.models import Schedule
+from src.subscriptions.models import Subscription
 from src.users.models import User
 from src.users.schemas import UserCreate
 from src.repositories import BaseRepo
@@ -8,3 +11,12 @@ from src.repositories import BaseRepo
 class UserRepo(BaseRepo[User, UserCreate]):
     def __init__(self, session: AsyncSession):
         super().__init__(session, User, UserCreate)
+
+    async def get_schedule_ids_by_user_id(self, user_id: int) -> list[int]:
+        """Returns the ids of the schedules a user owns or is subscribed to, the ones deleting the user changes."""
+        select_smth = union(
+            select(Schedule.id).where(Schedule.owner_id == user_id),
+            select(Subscription.schedule_id).where(Subscription.subscriber_id == user_id),
+        )
+
+        return list((await self.session.execute(select_smth)).scalars().all())
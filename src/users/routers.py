@@ -1,19 +1,23 @@
 import math
+from typing import Optional
 
 from fastapi import APIRouter, Query, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.cache import Principal, invalidate_principal
 from src.auth.config import fastapi_users
-from src.dependencies import get_pagination_params, PaginationParams
+from src.dependencies import get_pagination_params, PaginationParams, get_fields, get_exact
+from src.export import ExportFormat, export_response
 from src.exceptions import ItemNotFoundByIdException
-from src.responses import paginated_response_content
+from src.fields import FieldSelection, sparse_scheme
+from src.responses import paginated_response, json_response
+from src.schedules.cache import invalidate_schedule
 from src.schedules.repositories import ScheduleRepo
 from src.schedules.schemas import ScheduleRead
 from src.schemas import PaginatedResponseScheme
-from src.setup import get_async_session
+from src.setup import get_async_session, get_async_read_session
 from src.subscriptions.repositories import SubscriptionRepo
 from src.subscriptions.schemas import SubscriptionScheduleRead
-from src.users.models import User
 from src.users.repositories import UserRepo
 from src.users.schemas import UserRead
 
@@ -26,88 +30,121 @@ current_user = fastapi_users.current_user()
 
 
 @router.get("/", response_model=PaginatedResponseScheme[UserRead])
-async def get_users(session: AsyncSession = Depends(get_async_session),
-                    user: User = Depends(current_user),
-                    pagination_params: PaginationParams = Depends(get_pagination_params)):
+async def get_users(session: AsyncSession = Depends(get_async_read_session),
+                    user: Principal = Depends(current_user),
+                    pagination_params: PaginationParams = Depends(get_pagination_params),
+                    fields: Optional[FieldSelection] = Depends(get_fields),
+                    exact: bool = Depends(get_exact)):
     if not user.is_superuser:
         raise HTTPException(status_code=403, detail="Only superusers can retrieve users using this endpoint")
 
+    scheme = sparse_scheme(UserRead, fields)
     repo = UserRepo(session)
 
-    count = await repo.get_count()
-    result = await repo.get_all(page=pagination_params.page, size=pagination_params.size)
+    if exact:
+        count, approximate_count = await repo.get_count(), False
+    else:
+        count, approximate_count = await repo.get_approximate_count()
+    result = await repo.get_all(page=pagination_params.page, size=pagination_params.size,
+                                cursor=pagination_params.cursor,
+                                fields=fields)
+
+    return paginated_response(scheme,
+                              result,
+                              pagination_params.page,
+                              pagination_params.size,
+                              count,
+                              approximate_count=approximate_count)
+
+
+@router.get("/export")
+async def export_users(user: Principal = Depends(current_user),
+                       export_format: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format")):
+    if not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Only superusers can export users using this endpoint")
 
-    return paginated_response_content(result, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      count)
+    return export_response(UserRepo, UserRead, export_format, filename="users")
 
 
 @router.get("/{id}", response_model=UserRead)
 async def get_user(id: int,
-                   session: AsyncSession = Depends(get_async_session),
-                   user: User = Depends(current_user)):
+                   session: AsyncSession = Depends(get_async_read_session),
+                   user: Principal = Depends(current_user)):
     if not user.is_superuser and user.id != id:
         raise HTTPException(status_code=403, detail="Only superusers can retrieve user info using this endpoint")
 
     try:
         repo = UserRepo(session)
 
-        return await repo.get_by_id(id)
+        return json_response(UserRead, await repo.get_by_id(id))
     except ItemNotFoundByIdException:
         raise HTTPException(status_code=404, detail="Schedule not found")
 
 
 @router.get("/{id}/schedules", response_model=PaginatedResponseScheme[ScheduleRead])
 async def get_owned_schedules(id: int,
-                              session: AsyncSession = Depends(get_async_session),
-                              user: User = Depends(current_user),
-                              pagination_params: PaginationParams = Depends(get_pagination_params)):
+                              session: AsyncSession = Depends(get_async_read_session),
+                              user: Principal = Depends(current_user),
+                              pagination_params: PaginationParams = Depends(get_pagination_params),
+                              fields: Optional[FieldSelection] = Depends(get_fields)):
     if not user.is_superuser and user.id != id:
         raise HTTPException(status_code=403, detail="Only superusers can retrieve user info using this endpoint")
 
+    scheme = sparse_scheme(ScheduleRead, fields)
     repo = ScheduleRepo(session)
 
-    count = await repo.get_schedule_count_by_owner_id(owner_id=id)
     result = await repo.get_schedules_by_owner_id(owner_id=id, 
                                                   page=pagination_params.page, 
-                                                  size=pagination_params.size)
+                                                  size=pagination_params.size,
+                                                  cursor=pagination_params.cursor,
+                                                  with_count=True,
+                                                  fields=fields)
 
-    return paginated_response_content(result, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      count)
+    return paginated_response(scheme,
+                              result,
+                              pagination_params.page,
+                              pagination_params.size)
 
 
 @router.get("/{id}/subscriptions", response_model=PaginatedResponseScheme[SubscriptionScheduleRead])
 async def get_subscriptions(id: int,
-                            session: AsyncSession = Depends(get_async_session),
-                            user: User = Depends(current_user),
-                            pagination_params: PaginationParams = Depends(get_pagination_params)):
+                            session: AsyncSession = Depends(get_async_read_session),
+                            user: Principal = Depends(current_user),
+                            pagination_params: PaginationParams = Depends(get_pagination_params),
+                            fields: Optional[FieldSelection] = Depends(get_fields)):
     if not user.is_superuser and user.id != id:
         raise HTTPException(status_code=403, detail="Only superusers can retrieve subscriptions info using this endpoint")
 
+    scheme = sparse_scheme(SubscriptionScheduleRead, fields)
     repo = SubscriptionRepo(session)
 
-    count = await repo.get_subscription_count_by_owner_id(owner_id=id)
     result = await repo.get_subscriptions_by_subscriber_id(subscriber_id=id,
                                                           page=pagination_params.page,
-                                                          size=pagination_params.size)
+                                                          size=pagination_params.size,
+                                                          cursor=pagination_params.cursor,
+                                                          with_count=True,
+                                                          profile="subscription_with_schedule",
+                                                          fields=fields)
 
-    return paginated_response_content(result, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      count)
+    return paginated_response(scheme,
+                              result,
+                              pagination_params.page,
+                              pagination_params.size)
 
 
 @router.delete("/{id}")
 async def delete_user(id: int,
                       session: AsyncSession = Depends(get_async_session),
-                      user: User = Depends(current_user)):
+                      user: Principal = Depends(current_user)):
     if not user.is_superuser and user.id != id:
         raise HTTPException(status_code=403, detail="Only superusers can retrieve subscriptions info using this endpoint")
 
     repo = UserRepo(session)
 
+    # the delete cascades to the user's schedules and subscriptions, so their cached views go too
+    schedule_ids = await repo.get_schedule_ids_by_user_id(id)
     await repo.delete_by_id(id)
+    invalidate_principal(id)
+    for schedule_id in schedule_ids:
+        invalidate_schedule(schedule_id)
     return {"status": "success"}
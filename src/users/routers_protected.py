@@ -1,20 +1,28 @@
 import math
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.cache import Principal
 from src.auth.config import fastapi_users
-from src.dependencies import PaginationParams, get_pagination_params
+from src.conditional import PRIVATE_CACHE_CONTROL, Validators, not_modified
+from src.dependencies import PaginationParams, get_pagination_params, get_fields
+from src.events.repositories import EventsRepo
+from src.events.schemas import AgendaRead, DayOfWeek
 from src.exceptions import ItemNotFoundByIdException
-from src.responses import paginated_response_content
+from src.fields import FieldSelection, sparse_scheme
+from src.repositories import Page
+from src.responses import paginated_response, json_response
+from src.schedules.cache import invalidate_schedule
 from src.schedules.repositories import ScheduleRepo
 from src.schedules.schemas import ScheduleRead, ScheduleCreate, ScheduleBase, Schedule_Type
 from src.schemas import PaginatedResponseScheme
-from src.setup import get_async_session
+from src.setup import get_async_session, get_async_read_session
 from src.subscriptions.repositories import SubscriptionRepo
-from src.subscriptions.schemas import Subscription_Type, SubscriptionScheduleRead, SubscriptionCreate
-from src.users.models import User
+from src.subscriptions.schemas import Subscription_Type, SubscriptionScheduleRead, SubscriptionCreate, \
+    SubscriptionBulkCreate, SubscriptionBulkResult, SubscriptionBulkError
 
 router = APIRouter(
     prefix="/me",
@@ -25,84 +33,159 @@ current_user = fastapi_users.current_user()
 
 
 @router.get("/schedules", response_model=PaginatedResponseScheme[ScheduleRead])
-async def get_owned_schedules_as_authorized(session: AsyncSession = Depends(get_async_session),
-                                            user: User = Depends(current_user),
-                                            pagination_params: PaginationParams = Depends(get_pagination_params)):
+async def get_owned_schedules_as_authorized(request: Request,
+                                            session: AsyncSession = Depends(get_async_read_session),
+                                            user: Principal = Depends(current_user),
+                                            pagination_params: PaginationParams = Depends(get_pagination_params),
+                                            fields: Optional[FieldSelection] = Depends(get_fields)):
+    scheme = sparse_scheme(ScheduleRead, fields)
     repo = ScheduleRepo(session)
 
-    count = await repo.get_count()
+    last_modified, count, subscribers, events = await repo.get_validators_by_owner_id(owner_id=user.id)
+    validators = Validators.from_state("schedules", user.id, last_modified, count, subscribers, events,
+                                       request.url.query)
+    headers = validators.headers(PRIVATE_CACHE_CONTROL)
+    if validators.matches(request):
+        return not_modified(headers)
+
     result = await repo.get_schedules_by_owner_id(owner_id=user.id, 
                                                   page=pagination_params.page, 
-                                                  size=pagination_params.size)
+                                                  size=pagination_params.size,
+                                                  cursor=pagination_params.cursor,
+                                                  with_count=True,
+                                                  fields=fields)
 
-    return paginated_response_content(result, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      count)
+    return paginated_response(scheme,
+                              result,
+                              pagination_params.page,
+                              pagination_params.size,
+                              headers=headers)
 
 
 @router.get("/subscriptions/as_{subscription_type}", response_model=PaginatedResponseScheme[SubscriptionScheduleRead])
-async def get_subscriptions_by_its_type_as_authorized(session: AsyncSession = Depends(get_async_session),
-                                                      user: User = Depends(current_user),
+async def get_subscriptions_by_its_type_as_authorized(request: Request,
+                                                      session: AsyncSession = Depends(get_async_read_session),
+                                                      user: Principal = Depends(current_user),
                                                       subscription_type: Subscription_Type =
                                                         Subscription_Type.FOLLOWER,
-                                                      pagination_params: PaginationParams = Depends(get_pagination_params)):
+                                                      pagination_params: PaginationParams =
+                                                        Depends(get_pagination_params),
+                                                      fields: Optional[FieldSelection] = Depends(get_fields)):
+    scheme = sparse_scheme(SubscriptionScheduleRead, fields)
     repo = SubscriptionRepo(session)
 
-    subscription_count = await repo.get_subscription_count_by_subscriber_id(subscriber_id=user.id)
+    subscriptions_modified, schedules_modified, count, subscribers, events = \
+        await repo.get_validators_by_subscriber_id(subscriber_id=user.id, subscription_type=subscription_type)
+    validators = Validators.from_state("subscriptions", user.id, subscriptions_modified, schedules_modified, count,
+                                       subscribers, events, request.url.query)
+    headers = validators.headers(PRIVATE_CACHE_CONTROL)
+    if validators.matches(request):
+        return not_modified(headers)
 
     try:
         result = await repo.get_subscriptions_by_subscriber_id(subscriber_id=user.id,
                                                                page=pagination_params.page,
                                                                size=pagination_params.size,
-                                                               subscription_type=subscription_type)
+                                                               subscription_type=subscription_type,
+                                                               cursor=pagination_params.cursor,
+                                                               with_count=True,
+                                                               profile="subscription_with_schedule",
+                                                               fields=fields)
     except ItemNotFoundByIdException:
-        result = []
+        result = Page(items=[], count=0)
 
-    return paginated_response_content(result, 
-                                      pagination_params.page, 
-                                      pagination_params.size, 
-                                      subscription_count)
+    return paginated_response(scheme,
+                              result,
+                              pagination_params.page,
+                              pagination_params.size,
+                              headers=headers)
     
 
 
+@router.get("/agenda", response_model=AgendaRead)
+async def get_agenda_as_authorized(session: AsyncSession = Depends(get_async_read_session),
+                                   user: Principal = Depends(current_user),
+                                   days: Optional[List[DayOfWeek]] = Query(default=None, alias="day"),
+                                   pagination_params: PaginationParams = Depends(get_pagination_params)):
+    # a merged timeline has no stable offsets, so only the cursor of pagination_params is used
+    result = await EventsRepo(session).get_agenda_by_subscriber_id(subscriber_id=user.id,
+                                                                   size=pagination_params.size,
+                                                                   days=days,
+                                                                   cursor=pagination_params.cursor)
+
+    return json_response(AgendaRead, {"result": result.items, "size": pagination_params.size,
+                                      "next_cursor": result.next_cursor})
+
+
+async def follow_schedules(session: AsyncSession, user: Principal, schedule_ids: List[int]) -> SubscriptionBulkResult:
+    """
+    Subscribes the user to every visible schedule of the list with one visibility query and one insert.
+    Following a schedule twice is not an error.
+    """
+    schedules = await ScheduleRepo(session).get_by_ids(schedule_ids)
+
+    errors = []
+    allowed = []
+    for schedule_id in dict.fromkeys(schedule_ids):
+        schedule = schedules.get(schedule_id)
+        if schedule is None:
+            errors.append(SubscriptionBulkError(schedule_id=schedule_id, status_code=404,
+                                                detail="Schedule not found"))
+        elif schedule.owner_id == user.id:
+            errors.append(SubscriptionBulkError(schedule_id=schedule_id, status_code=403,
+                                                detail="You can't subscribe to your own schedule"))
+        elif schedule.schedule_type == Schedule_Type.PRIVATE:
+            errors.append(SubscriptionBulkError(schedule_id=schedule_id, status_code=403,
+                                                detail="You can't subscribe to private schedules"))
+        else:
+            allowed.append(schedule_id)
+
+    followed = await SubscriptionRepo(session).create_followers(subscriber_id=user.id, schedule_ids=allowed)
+    # their subscriber_count changed
+    for schedule_id in followed:
+        invalidate_schedule(schedule_id)
+    return SubscriptionBulkResult(schedule_ids=allowed, errors=errors)
+
+
+@router.post("/subscriptions/bulk", response_model=SubscriptionBulkResult)
+async def subscribe_bulk(subscriptions: SubscriptionBulkCreate,
+                         session: AsyncSession = Depends(get_async_session),
+                         user: Principal = Depends(current_user)):
+    return await follow_schedules(session, user, subscriptions.schedule_ids)
+
+
+@router.delete("/subscriptions/bulk", response_model=SubscriptionBulkResult)
+async def unsubscribe_bulk(schedule_ids: List[int] = Query(max_length=1000),
+                           session: AsyncSession = Depends(get_async_session),
+                           user: Principal = Depends(current_user)):
+    # owner subscriptions are kept; they go away with the schedule
+    removed = await SubscriptionRepo(session).delete_followers(subscriber_id=user.id, schedule_ids=schedule_ids)
+    for schedule_id in removed:
+        invalidate_schedule(schedule_id)
+    return SubscriptionBulkResult(schedule_ids=removed)
+
+
 @router.post("/subscriptions/add_as_follower/{schedule_id}")
 async def subscribe(schedule_id: int,
                     session: AsyncSession = Depends(get_async_session),
-                    user: User = Depends(current_user)):
-    schedule_repo = ScheduleRepo(session)
-
-    schedule = await schedule_repo.get_by_id(schedule_id)
-    if not schedule:
-        raise HTTPException(status_code=404, detail="Schedule not found")
-
-    if schedule.owner_id == user.id:
-        raise HTTPException(status_code=403, detail="You can't subscribe to your own schedule")
-
-    if schedule.schedule_type == Schedule_Type.PRIVATE:
-        raise HTTPException(status_code=403, detail="You can't subscribe to private schedules")
-
-    repo = SubscriptionRepo(session)
-
-    new_subscription = SubscriptionCreate(
-        subscriber_id=user.id,
-        schedule_id=schedule_id,
-        subscription_type=Subscription_Type.FOLLOWER
-    )
+                    user: Principal = Depends(current_user)):
+    result = await follow_schedules(session, user, [schedule_id])
+    if result.errors:
+        raise HTTPException(status_code=result.errors[0].status_code, detail=result.errors[0].detail)
 
-    await repo.create(new_subscription)
     return {"status": "success"}
 
 
 @router.delete("/schedules/{schedule_id}")
 async def delete_owned_schedule_as_authorized(schedule_id: int,
                                               session: AsyncSession = Depends(get_async_session),
-                                              user: User = Depends(current_user)):
+                                              user: Principal = Depends(current_user)):
     repo = ScheduleRepo(session)
 
     schedule = await repo.get_by_id(schedule_id)
     if schedule and schedule.owner_id == user.id:
         await repo.delete_by_id(schedule_id)
+        invalidate_schedule(schedule_id)
         return {"status": "success"}
 
     return {"status": "fail"}
@@ -110,12 +193,13 @@ async def delete_owned_schedule_as_authorized(schedule_id: int,
 @router.delete("/subscriptions/{subscription_id}")
 async def delete_subscription_as_authorized(subscription_id: int,
                                               session: AsyncSession = Depends(get_async_session),
-                                              user: User = Depends(current_user)):
+                                              user: Principal = Depends(current_user)):
     repo = SubscriptionRepo(session)
 
     subscription = await repo.get_by_id(subscription_id)
     if subscription and subscription.subscriber_id == user.id:
         await repo.delete_by_id(subscription_id)
+        invalidate_schedule(subscription.schedule_id)
         return {"status": "success"}
 
     return {"status": "fail"}
@@ -123,7 +207,7 @@ async def delete_subscription_as_authorized(subscription_id: int,
 @router.post("/schedules")
 async def create_owned_schedule_as_authorized(new_schedule: ScheduleBase,
                                               session: AsyncSession = Depends(get_async_session),
-                                              user: User = Depends(current_user)):
+                                              user: Principal = Depends(current_user)):
     try:
         schedule_repo = ScheduleRepo(session)
         subscription_repo = SubscriptionRepo(session)
@@ -0,0 +1,116 @@
+"""
+Database tests run against their own database, TEST_DB_NAME (test_<DB_NAME> by default) on the server
+of the DB_* settings. It is dropped, recreated from the migrations and seeded with benchmarks.dataset
+once per run; tests that need it are skipped when the server isn't reachable.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+import asyncpg
+import httpx
+import pytest
+from dotenv import load_dotenv
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# the settings are read when src.setup is imported, so the test database has to be chosen first
+load_dotenv(ROOT / ".env")
+os.environ.setdefault("SECRET_KEY", "test")
+TEST_DB_NAME = os.environ.get("TEST_DB_NAME") or f"test_{os.environ.get('DB_NAME', 'scheduler')}"
+os.environ["DB_NAME"] = TEST_DB_NAME
+
+from sqlalchemy import event  # noqa: E402
+
+from benchmarks.dataset import Dataset, DatasetConfig, load  # noqa: E402
+from src.auth.config import get_jwt_strategy  # noqa: E402
+from src.config import DbConfig  # noqa: E402
+from src.main import app  # noqa: E402
+from src.setup import engine  # noqa: E402
+
+# every model has to be imported before the first query is compiled, so relationships resolve
+from src.users.models import User  # noqa: E402,F401
+from src.events.models import Event  # noqa: E402,F401
+from src.schedules.models import Schedule  # noqa: E402,F401
+from src.subscriptions.models import Subscription  # noqa: E402,F401
+
+TEST_DATASET = DatasetConfig(users=100)
+
+
+def run(coroutine):
+    """
+    Runs a coroutine in its own event loop. Pooled connections belong to the loop that opened them,
+    so the pool is emptied before the loop closes.
+    """
+    async def run_and_dispose():
+        try:
+            return await coroutine
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+async def send(method: str, path: str, user_id: Optional[int], headers: Optional[dict] = None,
+               **kwargs) -> httpx.Response:
+    """
+    A request to the app, authenticated as the user unless user_id is None.
+    Other keyword arguments (json, files, ...) are passed on to httpx.
+    """
+    headers = dict(headers or {})
+    if user_id is not None:
+        token = await get_jwt_strategy().write_token(SimpleNamespace(id=user_id))
+        headers["Authorization"] = f"Bearer {token}"
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.request(method, path, headers=headers, **kwargs)
+
+
+async def get(path: str, user_id: Optional[int], headers: Optional[dict] = None) -> httpx.Response:
+    return await send("GET", path, user_id, headers)
+
+
+async def recreate_database():
+    config = DbConfig.from_env()
+    connection = await asyncpg.connect(host=config.host, port=config.port, user=config.user,
+                                       password=config.password, database="postgres", timeout=5)
+    try:
+        await connection.execute(f'DROP DATABASE IF EXISTS "{TEST_DB_NAME}" WITH (FORCE)')
+        await connection.execute(f'CREATE DATABASE "{TEST_DB_NAME}"')
+    finally:
+        await connection.close()
+
+
+@pytest.fixture(scope="session")
+def database():
+    """The test database at the latest migration."""
+    try:
+        asyncio.run(recreate_database())
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as error:
+        pytest.skip(f"no Postgres to create {TEST_DB_NAME} on: {error}")
+
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, check=True, capture_output=True)
+
+
+@pytest.fixture(scope="session")
+def dataset(database) -> Dataset:
+    """The test database seeded with a small deterministic dataset; tests must leave it as they found it."""
+    dataset = Dataset(TEST_DATASET)
+    run(load(engine, dataset))
+    return dataset
+
+
+@pytest.fixture
+def statements() -> list[str]:
+    """The SQL statements the app's engine executes while the test runs."""
+    recorded = []
+
+    def record(connection, cursor, statement, *_):
+        recorded.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
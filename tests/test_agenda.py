@@ -0,0 +1,38 @@
+from urllib.parse import quote
+
+from benchmarks.dataset import Dataset
+from conftest import get, run
+from src.events.schemas import DayOfWeek
+
+SUBSCRIBER_ID = 5
+
+
+def expected_agenda(dataset: Dataset, subscriber_id: int, days=tuple(DayOfWeek)) -> list[int]:
+    schedule_ids = {row[2] for row in dataset.subscription_rows() if row[1] == subscriber_id}
+    day_positions = {day: position for position, day in enumerate(DayOfWeek)}
+    events = [row for row in dataset.event_rows() if row[1] in schedule_ids and row[4] in days]
+    return [row[0] for row in sorted(events, key=lambda row: (day_positions[row[4]], row[5], row[0]))]
+
+
+def read_agenda(query: str) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        path = f"/me/agenda?size=7{query}" + (f"&cursor={quote(cursor)}" if cursor else "")
+        page = run(get(path, SUBSCRIBER_ID)).json()
+        ids += [event["id"] for event in page["result"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_agenda_pages_through_every_subscribed_event(dataset: Dataset):
+    expected = expected_agenda(dataset, SUBSCRIBER_ID)
+    assert len(expected) > 7
+
+    assert read_agenda("") == expected
+
+
+def test_agenda_of_some_days(dataset: Dataset):
+    days = (DayOfWeek.MONDAY, DayOfWeek.FRIDAY)
+
+    assert read_agenda("&day=monday&day=friday") == expected_agenda(dataset, SUBSCRIBER_ID, days)
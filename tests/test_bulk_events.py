@@ -0,0 +1,64 @@
+import pytest
+
+from benchmarks.dataset import Dataset
+from conftest import run, send
+
+
+def early_event(schedule_id: int, start_hour: int, **values) -> dict:
+    """An event before the dataset's first events of the day (see EVENT_HOURS)."""
+    return {"name": "Early practice", "day_of_week": "saturday", "start_time": f"{start_hour:02}:00:00",
+            "end_time": f"{start_hour:02}:30:00", "schedule_id": schedule_id, **values}
+
+
+@pytest.fixture
+def schedule(dataset: Dataset):
+    """(schedule id, owner id); events the test creates through create_events are deleted afterwards."""
+    schedule_id = dataset.public_schedule_ids[0]
+    owner_id = dataset.owner_of(schedule_id)
+    created = []
+    yield schedule_id, owner_id, created
+
+    for event_id in created:
+        assert run(send("DELETE", f"/events/{event_id}", owner_id)).status_code == 200
+
+
+def create_events(schedule, events: list) -> dict:
+    _, owner_id, created = schedule
+    response = run(send("POST", "/events/bulk", owner_id, json=events))
+    assert response.status_code == 200, response.text
+
+    result = response.json()
+    created += [event_id for event_id in result["ids"] if event_id is not None]
+    return result
+
+
+def test_bulk_create_without_descriptions(schedule):
+    schedule_id = schedule[0]
+
+    result = create_events(schedule, [early_event(schedule_id, 5), early_event(schedule_id, 6, description=None)])
+
+    assert result["errors"] == []
+    assert None not in result["ids"]
+
+
+def test_bulk_create_reports_invalid_items_and_creates_the_rest(schedule, dataset: Dataset):
+    schedule_id = schedule[0]
+    missing_schedule_id = len(dataset.schedule_owners) + 1
+
+    result = create_events(schedule, [
+        early_event(schedule_id, 5),
+        early_event(schedule_id, 6, end_time="05:00:00"),
+        {"name": "No times", "day_of_week": "saturday", "schedule_id": schedule_id},
+        early_event(missing_schedule_id, 6),
+        early_event(schedule_id, 6),
+        early_event(schedule_id, 5),
+    ])
+
+    assert [event_id is not None for event_id in result["ids"]] == [True, False, False, False, True, False]
+    errors = {error["index"]: (error["status_code"], error["detail"]) for error in result["errors"]}
+    assert errors == {
+        1: (422, "Value error, end_time must be after start_time"),
+        2: (422, "start_time: Field required; end_time: Field required"),
+        3: (404, "Schedule not found"),
+        5: (409, "Event overlaps item 0 of the same request"),
+    }
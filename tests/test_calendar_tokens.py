@@ -0,0 +1,76 @@
+from urllib.parse import quote
+
+import pytest
+from sqlalchemy import update
+
+from benchmarks.dataset import Dataset
+from conftest import get, run, send
+from src.auth.cache import invalidate_principal
+from src.schedules.schemas import Schedule_Type
+from src.setup import async_session_maker
+from src.users.models import User
+
+
+def feed(schedule_id: int, token: str = None, user_id: int = None):
+    path = f"/schedules/{schedule_id}/calendar.ics"
+    return run(get(f"{path}?token={quote(token)}" if token else path, user_id))
+
+
+async def set_active(user_id: int, is_active: bool):
+    async with async_session_maker() as session:
+        await session.execute(update(User).where(User.id == user_id).values(is_active=is_active))
+        await session.commit()
+    invalidate_principal(user_id)
+
+
+@pytest.fixture
+def private_schedule(dataset: Dataset) -> tuple[int, int]:
+    """(schedule id, owner id) of a private schedule."""
+    schedule_id = next(schedule_id for schedule_id in dataset.schedule_ids()
+                       if dataset.schedule_types[schedule_id - 1] == Schedule_Type.PRIVATE)
+    return schedule_id, dataset.owner_of(schedule_id)
+
+
+def test_public_feed_needs_no_authentication(dataset: Dataset):
+    assert feed(dataset.public_schedule_ids[0]).status_code == 200
+
+
+def test_private_feed_needs_a_token(private_schedule):
+    schedule_id, owner_id = private_schedule
+    token = run(get(f"/schedules/{schedule_id}/calendar_token", owner_id)).json()["token"]
+
+    assert feed(schedule_id).status_code == 403
+    assert feed(schedule_id, token).status_code == 200
+    assert feed(schedule_id + 1, token).status_code == 403
+
+
+def test_deactivated_owner_loses_access(private_schedule):
+    schedule_id, owner_id = private_schedule
+    token = run(get(f"/schedules/{schedule_id}/calendar_token", owner_id)).json()["token"]
+
+    run(set_active(owner_id, False))
+    try:
+        by_token = feed(schedule_id, token)
+        by_header = feed(schedule_id, user_id=owner_id)
+    finally:
+        run(set_active(owner_id, True))
+
+    assert by_token.status_code == 403
+    assert by_header.status_code == 403
+    assert feed(schedule_id, token).status_code == 200
+
+
+def test_reset_revokes_issued_tokens(private_schedule, dataset: Dataset):
+    schedule_id, owner_id = private_schedule
+    old_token = run(get(f"/schedules/{schedule_id}/calendar_token", owner_id)).json()["token"]
+
+    other_user_id = next(user_id for user_id in range(2, dataset.config.users + 1) if user_id != owner_id)
+    assert run(send("POST", f"/schedules/{schedule_id}/calendar_token/reset", other_user_id)).status_code == 403
+
+    reset = run(send("POST", f"/schedules/{schedule_id}/calendar_token/reset", owner_id))
+    assert reset.status_code == 200
+    new_token = reset.json()["token"]
+
+    assert feed(schedule_id, old_token).status_code == 403
+    assert feed(schedule_id, new_token).status_code == 200
+    assert run(get(f"/schedules/{schedule_id}/calendar_token", owner_id)).json()["token"] == new_token
@@ -0,0 +1,60 @@
+"""An event has to end after it starts, on the same day, whichever way it is created."""
+import pytest
+
+from benchmarks.dataset import Dataset
+from conftest import get, run, send
+
+# would wrap past midnight; an overlap check taking it as an interval would miss everything inside it
+INVERTED = {"name": "Night shift", "description": "", "day_of_week": "sunday",
+            "start_time": "23:00:00", "end_time": "01:00:00"}
+
+
+@pytest.fixture
+def schedule(dataset: Dataset) -> tuple[int, int]:
+    """(schedule id, owner id)"""
+    schedule_id = dataset.public_schedule_ids[0]
+    return schedule_id, dataset.owner_of(schedule_id)
+
+
+def event_count(schedule_id: int, owner_id: int) -> int:
+    return run(get(f"/schedules/{schedule_id}/events", owner_id)).json()["count"]
+
+
+@pytest.mark.parametrize("end_time", ["01:00:00", "23:00:00"])
+def test_create_rejects_events_not_ending_after_they_start(schedule, end_time):
+    schedule_id, owner_id = schedule
+    count = event_count(schedule_id, owner_id)
+
+    response = run(send("POST", "/events/", owner_id,
+                        json={**INVERTED, "end_time": end_time, "schedule_id": schedule_id}))
+
+    assert response.status_code == 422
+    assert "end_time must be after start_time" in response.text
+    assert event_count(schedule_id, owner_id) == count
+
+
+def test_bulk_create_rejects_inverted_events(schedule):
+    schedule_id, owner_id = schedule
+    count = event_count(schedule_id, owner_id)
+
+    response = run(send("POST", "/events/bulk", owner_id, json=[{**INVERTED, "schedule_id": schedule_id}]))
+
+    assert response.status_code == 200
+    assert response.json() == {"ids": [None], "errors": [
+        {"index": 0, "status_code": 422, "detail": "Value error, end_time must be after start_time"}]}
+    assert event_count(schedule_id, owner_id) == count
+
+
+def test_import_reports_inverted_events(schedule):
+    schedule_id, owner_id = schedule
+    count = event_count(schedule_id, owner_id)
+    upload = "name,day_of_week,start_time,end_time\nNight shift,SU,23:00,01:00\n"
+
+    response = run(send("POST", f"/schedules/{schedule_id}/import", owner_id,
+                        files={"file": ("events.csv", upload, "text/csv")}))
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["created"], report["failed"]) == (0, 1)
+    assert report["errors"] == [{"line": 2, "detail": "Value error, end_time must be after start_time"}]
+    assert event_count(schedule_id, owner_id) == count
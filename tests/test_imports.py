@@ -0,0 +1,34 @@
+import datetime
+import io
+
+from src.events.imports import parse_ics
+from src.events.schemas import DayOfWeek
+from src.schedules.calendar import escape_text
+
+
+def vevent(*properties: str) -> io.StringIO:
+    lines = ["BEGIN:VCALENDAR", "BEGIN:VEVENT", "DTSTART:20261019T090000", "RRULE:FREQ=WEEKLY;BYDAY=MO",
+             *properties, "END:VEVENT", "END:VCALENDAR"]
+    return io.StringIO("\r\n".join(lines) + "\r\n")
+
+
+def test_exported_text_is_imported_unchanged():
+    name = "C:\\lectures\\n, week 1; room\\2"
+    description = "Line one\nLine two \\ end"
+
+    [row] = parse_ics(vevent("DTEND:20261019T100000", f"SUMMARY:{escape_text(name)}",
+                             f"DESCRIPTION:{escape_text(description)}"), schedule_id=1)
+
+    assert (row.event.name, row.event.description) == (name, description)
+
+
+def test_durations():
+    [row] = parse_ics(vevent("SUMMARY:Lecture", "DURATION:PT1H30M"), schedule_id=1)
+    assert (row.event.day_of_week, row.event.end_time) == (DayOfWeek.MONDAY, datetime.time(10, 30))
+
+    # a week is a valid duration, it just doesn't end on the day it starts
+    [row] = parse_ics(vevent("SUMMARY:Lecture", "DURATION:P1W"), schedule_id=1)
+    assert row.error == "Events must end on the day they start"
+
+    [row] = parse_ics(vevent("SUMMARY:Lecture", "DURATION:P1WT1H"), schedule_id=1)
+    assert row.error == "All-day events and unparsable DTSTART/DTEND/DURATION are not supported"
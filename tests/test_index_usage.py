@@ -0,0 +1,184 @@
+"""
+Every repository access path is served by one of the indexes declared on the models. The statements
+a method executes on the seeded database are recorded and explained again with sequential scans
+disabled: the planner still falls back to a Seq Scan when no index can serve a query, so on a dataset
+this small that is what tells a missing index apart from a cheap table.
+"""
+import datetime
+import json
+
+import pytest
+from sqlalchemy import event, inspect
+
+from benchmarks.dataset import Dataset
+from conftest import run
+from src.events.repositories import EventsRepo
+from src.events.schemas import DayOfWeek
+from src.models import BaseModel
+from src.schedules.repositories import ScheduleRepo
+from src.setup import async_session_maker, engine
+from src.subscriptions.repositories import SubscriptionRepo
+from src.subscriptions.schemas import Subscription_Type
+
+SCHEDULE_ID = 3
+OWNER_ID = 2
+SUBSCRIBER_ID = 5
+
+EVENT_BY_SCHEDULE = {"event": {"ix_event_schedule_id_day_of_week_start_time"}}
+SCHEDULE_BY_OWNER = {"schedule": {"ix_schedule_owner_id"}}
+SUBSCRIPTION_BY_SCHEDULE = {"subscription": {"ix_subscription_schedule_id"}}
+# the unique (subscriber_id, schedule_id) constraint serves a subscriber's rows just as well
+SUBSCRIPTION_BY_SUBSCRIBER = {"subscription": {"ix_subscription_subscriber_id_subscription_type",
+                                               "uq_subscription_subscriber_id_schedule_id"}}
+
+# method name: (call, {table: indexes of which one must serve it})
+ACCESS_PATHS = {
+    "EventsRepo.get_all": (
+        lambda session: EventsRepo(session).get_all(page=0, size=20),
+        {"event": {"ix_event_day_of_week_start_time"}},
+    ),
+    "EventsRepo.get_all_by_schedule_id": (
+        lambda session: EventsRepo(session).get_all_by_schedule_id(SCHEDULE_ID, page=0, size=20),
+        EVENT_BY_SCHEDULE,
+    ),
+    "EventsRepo.get_all_by_schedule_id(with_count)": (
+        lambda session: EventsRepo(session).get_all_by_schedule_id(SCHEDULE_ID, page=0, size=20, with_count=True),
+        EVENT_BY_SCHEDULE,
+    ),
+    "EventsRepo.get_week_by_schedule_id": (
+        lambda session: EventsRepo(session).get_week_by_schedule_id(SCHEDULE_ID),
+        EVENT_BY_SCHEDULE,
+    ),
+    "EventsRepo.get_intervals_by_schedule_id": (
+        lambda session: EventsRepo(session).get_intervals_by_schedule_id(SCHEDULE_ID),
+        EVENT_BY_SCHEDULE,
+    ),
+    "EventsRepo.get_interval_index": (
+        lambda session: EventsRepo(session).get_interval_index([SCHEDULE_ID, SCHEDULE_ID + 1]),
+        EVENT_BY_SCHEDULE,
+    ),
+    "EventsRepo.get_overlapping_event_id": (
+        lambda session: EventsRepo(session).get_overlapping_event_id(SCHEDULE_ID, DayOfWeek.MONDAY,
+                                                                     datetime.time(9), datetime.time(10)),
+        EVENT_BY_SCHEDULE,
+    ),
+    "EventsRepo.get_validators_by_schedule_id": (
+        lambda session: EventsRepo(session).get_validators_by_schedule_id(SCHEDULE_ID),
+        EVENT_BY_SCHEDULE,
+    ),
+    "EventsRepo.get_events_count_by_schedule_id": (
+        lambda session: EventsRepo(session).get_events_count_by_schedule_id(SCHEDULE_ID),
+        EVENT_BY_SCHEDULE,
+    ),
+    "EventsRepo.get_agenda_by_subscriber_id": (
+        lambda session: EventsRepo(session).get_agenda_by_subscriber_id(SUBSCRIBER_ID, size=20),
+        {**EVENT_BY_SCHEDULE, **SUBSCRIPTION_BY_SUBSCRIBER},
+    ),
+    "ScheduleRepo.get_schedules_by_owner_id": (
+        lambda session: ScheduleRepo(session).get_schedules_by_owner_id(OWNER_ID, page=0, size=20),
+        SCHEDULE_BY_OWNER,
+    ),
+    "ScheduleRepo.get_validators_by_owner_id": (
+        lambda session: ScheduleRepo(session).get_validators_by_owner_id(OWNER_ID),
+        SCHEDULE_BY_OWNER,
+    ),
+    "ScheduleRepo.get_schedule_count_by_owner_id": (
+        lambda session: ScheduleRepo(session).get_schedule_count_by_owner_id(OWNER_ID),
+        SCHEDULE_BY_OWNER,
+    ),
+    "SubscriptionRepo.get_subscriptions_by_schedule_id": (
+        lambda session: SubscriptionRepo(session).get_subscriptions_by_schedule_id(SCHEDULE_ID, page=0, size=20),
+        SUBSCRIPTION_BY_SCHEDULE,
+    ),
+    "SubscriptionRepo.get_subscription_count_by_schedule_id": (
+        lambda session: SubscriptionRepo(session).get_subscription_count_by_schedule_id(SCHEDULE_ID),
+        SUBSCRIPTION_BY_SCHEDULE,
+    ),
+    "SubscriptionRepo.get_subscriptions_by_subscriber_id": (
+        lambda session: SubscriptionRepo(session).get_subscriptions_by_subscriber_id(
+            SUBSCRIBER_ID, page=0, size=20, subscription_type=Subscription_Type.FOLLOWER),
+        {"subscription": {"ix_subscription_subscriber_id_subscription_type"}},
+    ),
+    "SubscriptionRepo.get_validators_by_subscriber_id": (
+        lambda session: SubscriptionRepo(session).get_validators_by_subscriber_id(SUBSCRIBER_ID),
+        SUBSCRIPTION_BY_SUBSCRIBER,
+    ),
+    "SubscriptionRepo.get_subscription_count_by_subscriber_id": (
+        lambda session: SubscriptionRepo(session).get_subscription_count_by_subscriber_id(SUBSCRIBER_ID),
+        SUBSCRIPTION_BY_SUBSCRIBER,
+    ),
+    "SubscriptionRepo.get_subscription_count_by_owner_id": (
+        lambda session: SubscriptionRepo(session).get_subscription_count_by_owner_id(OWNER_ID),
+        {**SCHEDULE_BY_OWNER, **SUBSCRIPTION_BY_SCHEDULE},
+    ),
+}
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+async def explain(call) -> list[dict]:
+    """Runs a repository call and returns the plans of the statements it executed."""
+    recorded = []
+
+    def record(connection, cursor, statement, parameters, *_):
+        recorded.append((statement, parameters))
+
+    async with async_session_maker() as session:
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            await call(session)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+        connection = await session.connection()
+        await connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plans = []
+        for statement, parameters in recorded:
+            result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            explained = result.scalar_one()
+            plans.append((json.loads(explained) if isinstance(explained, str) else explained)[0]["Plan"])
+        return plans
+
+
+@pytest.mark.parametrize("access_path", ACCESS_PATHS)
+def test_access_path_uses_index(access_path, dataset: Dataset):
+    call, expected = ACCESS_PATHS[access_path]
+    plans = run(explain(call))
+    assert plans
+
+    nodes = [node for plan in plans for node in plan_nodes(plan)]
+    used_indexes = {node["Index Name"] for node in nodes if "Index Name" in node}
+    scanned_tables = {node["Relation Name"] for node in nodes if node["Node Type"] == "Seq Scan"}
+
+    for table, indexes in expected.items():
+        assert table not in scanned_tables, plans
+        assert used_indexes & indexes, plans
+
+
+async def migrated_indexes(table: str) -> dict[str, list[str]]:
+    async with engine.connect() as connection:
+        indexes = await connection.run_sync(lambda sync_connection: inspect(sync_connection).get_indexes(table))
+    # the indexes behind unique constraints are declared as constraints
+    return {index["name"]: index["column_names"] for index in indexes if "duplicates_constraint" not in index}
+
+
+@pytest.mark.parametrize("table", ["event", "schedule", "subscription"])
+def test_model_indexes_match_migrations(table, database):
+    declared = {index.name: [column.name for column in index.columns]
+                for index in BaseModel.metadata.tables[table].indexes}
+
+    assert run(migrated_indexes(table)) == declared
+
+
+def test_agenda_reads_a_bounded_range_per_schedule(dataset: Dataset):
+    call = lambda session: EventsRepo(session).get_agenda_by_subscriber_id(SUBSCRIBER_ID, size=20)
+    nodes = [node for plan in run(explain(call)) for node in plan_nodes(plan)]
+
+    # the LIMIT of each subscription's stream applies to the ordered index scan, not to a sort of all its events
+    limits = [node for node in nodes if node["Node Type"] == "Limit"]
+    assert [(child["Node Type"], child.get("Index Name")) for node in limits for child in node["Plans"]] == \
+        [("Index Scan", "ix_event_schedule_id_day_of_week_start_time")]
@@ -0,0 +1,16 @@
+from benchmarks.load import Samples
+
+
+def test_report_of_a_single_request():
+    report = Samples(latencies=[0.012], queries=[3]).report(duration=1.0)
+
+    assert report["requests"] == 1
+    assert report["latency_ms"]["p50"] == report["latency_ms"]["p99"] == report["latency_ms"]["max"] == 12.0
+
+
+def test_report_percentiles():
+    report = Samples(latencies=[i / 1000 for i in range(1, 101)], queries=[1] * 100).report(duration=2.0)
+
+    assert report["throughput_rps"] == 50.0
+    assert report["latency_ms"]["p50"] == 50.5
+    assert report["latency_ms"]["p99"] == 99.01
@@ -0,0 +1,86 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from src.events.models import Event
+from src.events.repositories import EventsRepo
+from src.events.schemas import DayOfWeek
+from src.exceptions import InvalidCursorException
+from src.schedules.repositories import ScheduleRepo
+from src.subscriptions.repositories import SubscriptionRepo
+from src.users.repositories import UserRepo
+
+
+class RecordingSession:
+    """Stands in for an AsyncSession: keeps the statements it is given and returns no rows."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(all=list, scalars=lambda: SimpleNamespace(all=list))
+
+
+def compile_postgresql(query):
+    return query.compile(dialect=postgresql.dialect())
+
+
+def test_page_is_limited_in_sql():
+    compiled = compile_postgresql(EventsRepo(None).paginate(select(Event), page=3, size=20))
+
+    assert "LIMIT %(param_1)s" in compiled.string
+    assert "OFFSET %(param_2)s" in compiled.string
+    assert compiled.params["param_1"] == 20
+    assert compiled.params["param_2"] == 60
+
+
+def test_page_is_ordered_by_keyset():
+    compiled = compile_postgresql(EventsRepo(None).paginate(select(Event), page=0, size=10))
+
+    assert "ORDER BY event.day_of_week, event.start_time, event.id" in compiled.string
+
+
+def test_cursor_seeks_past_key_instead_of_offset():
+    repo = EventsRepo(None)
+    last_seen = SimpleNamespace(day_of_week=DayOfWeek.TUESDAY, start_time=datetime.time(9, 30), id=42)
+
+    compiled = compile_postgresql(repo.paginate(select(Event), page=5, size=10, cursor=repo.encode_cursor(last_seen)))
+
+    assert "> (%(param_1)s, %(param_2)s, %(param_3)s)" in compiled.string
+    assert "LIMIT %(param_4)s" in compiled.string
+    assert "OFFSET" not in compiled.string
+    assert compiled.params == {
+        "param_1": DayOfWeek.TUESDAY, "param_2": datetime.time(9, 30), "param_3": 42, "param_4": 10,
+    }
+
+
+@pytest.mark.parametrize("repo_class, method, arguments", [
+    (EventsRepo, "get_all", ()),
+    (EventsRepo, "get_all_by_schedule_id", (7,)),
+    (ScheduleRepo, "get_all", ()),
+    (ScheduleRepo, "get_schedules_by_owner_id", (7,)),
+    (SubscriptionRepo, "get_all", ()),
+    (SubscriptionRepo, "get_subscriptions_by_schedule_id", (7,)),
+    (SubscriptionRepo, "get_subscriptions_by_subscriber_id", (7,)),
+    (UserRepo, "get_all", ()),
+])
+def test_repository_lists_fetch_one_page(repo_class, method, arguments):
+    session = RecordingSession()
+    asyncio.run(getattr(repo_class(session), method)(*arguments, page=2, size=15))
+
+    [statement] = session.statements
+    compiled = compile_postgresql(statement)
+    assert "LIMIT" in compiled.string
+    assert "OFFSET" in compiled.string
+    assert 15 in compiled.params.values()
+    assert 30 in compiled.params.values()
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(InvalidCursorException):
+        EventsRepo(None).paginate(select(Event), page=0, size=10, cursor="not a cursor")
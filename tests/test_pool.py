@@ -0,0 +1,44 @@
+import asyncio
+import sqlite3
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from src.pool import InstrumentedQueuePool, pool_status
+
+
+def check_out_past_limit(pool: InstrumentedQueuePool):
+    # the async adapted queue only blocks inside the greenlet an async engine runs its calls in
+    def check_out_twice():
+        connection = pool.connect()
+        try:
+            with pytest.raises(exc.TimeoutError):
+                pool.connect()
+        finally:
+            connection.close()
+
+    asyncio.run(greenlet_spawn(check_out_twice))
+
+
+def test_timed_out_checkouts_are_not_counted_as_waits():
+    pool = InstrumentedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.05)
+
+    check_out_past_limit(pool)
+
+    assert pool.statistics.checkouts == 1
+    assert pool.statistics.timeouts == 1
+    # the timed out attempt waited for the whole timeout; the successful one didn't
+    assert pool.statistics.max_wait < 0.05
+
+
+def test_pool_status_reports_statistics():
+    pool = InstrumentedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.05)
+
+    check_out_past_limit(pool)
+    status = pool_status(pool)
+
+    assert status["checkouts"] == 1
+    assert status["timeouts"] == 1
+    assert status["checked_out"] == 0
+    assert status["avg_wait_ms"] < 50
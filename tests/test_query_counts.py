@@ -0,0 +1,87 @@
+"""
+The relationships an endpoint serialises are loaded by its load profile together with the page (or the item),
+so the statements per request don't grow with the page size, and nothing is lazy loaded (which would
+raise MissingGreenlet under the async session and answer 500).
+"""
+from collections import Counter
+
+import pytest
+
+from benchmarks.dataset import SUPERUSER_ID, Dataset
+from conftest import get, run
+from src.schedules.schemas import Schedule_Type
+
+
+def most_followed_schedule(dataset: Dataset) -> int:
+    return Counter(row[2] for row in dataset.subscription_rows()).most_common(1)[0][0]
+
+
+def most_subscribed_user(dataset: Dataset) -> int:
+    return Counter(row[1] for row in dataset.subscription_rows()).most_common(1)[0][0]
+
+
+def busiest_owner(dataset: Dataset) -> int:
+    return Counter(dataset.schedule_owners).most_common(1)[0][0]
+
+
+def busiest_private_schedule(dataset: Dataset) -> int:
+    """The private schedule with the most events; public ones are answered from the response cache."""
+    private = {schedule_id for schedule_id in dataset.schedule_ids()
+               if dataset.schedule_types[schedule_id - 1] == Schedule_Type.PRIVATE}
+    return Counter(row[1] for row in dataset.event_rows() if row[1] in private).most_common(1)[0][0]
+
+
+def first_event(dataset: Dataset) -> int:
+    return next(dataset.event_rows())[0]
+
+
+def superuser(dataset: Dataset) -> int:
+    return SUPERUSER_ID
+
+
+# (path, user, statements besides the page or item itself, the field an item must carry loaded or None)
+ENDPOINTS = {
+    "/schedules/": (lambda dataset: "/schedules/", superuser, 1, "owner"),
+    "/events/": (lambda dataset: "/events/", superuser, 1, "schedule"),
+    "/subscriptions/": (lambda dataset: "/subscriptions/", superuser, 1, "schedule"),
+    # the total comes with the page, through a window count
+    "/users/{id}/subscriptions": (lambda dataset: f"/users/{most_subscribed_user(dataset)}/subscriptions",
+                                  superuser, 0, "schedule"),
+    # the schedule is looked up first; its subscriber_count is the total
+    "/schedules/{id}/subscribers": (lambda dataset: f"/schedules/{most_followed_schedule(dataset)}/subscribers",
+                                    superuser, 1, "subscriber"),
+    "/schedules/{id}": (lambda dataset: f"/schedules/{busiest_private_schedule(dataset)}", superuser, 0, "owner"),
+    "/events/{id}": (lambda dataset: f"/events/{first_event(dataset)}", superuser, 0, "schedule"),
+    # the schedule is looked up first for its visibility and event_count, then the validators of its events
+    "/schedules/{id}/events": (lambda dataset: f"/schedules/{busiest_private_schedule(dataset)}/events",
+                               superuser, 2, None),
+    "/users/{id}/schedules": (lambda dataset: f"/users/{busiest_owner(dataset)}/schedules", superuser, 0, None),
+    # the validators are read first
+    "/me/subscriptions/as_follower": (lambda dataset: "/me/subscriptions/as_follower", most_subscribed_user, 1,
+                                      "schedule"),
+}
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_page_is_one_statement(endpoint, dataset, statements):
+    path, user, other_statements, relationship = ENDPOINTS[endpoint]
+    path, user_id = path(dataset), user(dataset)
+
+    # the first request of a user loads it into the principal cache
+    assert run(get(f"{path}?size=1", user_id)).status_code == 200
+
+    counts = {}
+    for size in (2, 50):
+        statements.clear()
+        response = run(get(f"{path}?size={size}", user_id))
+
+        assert response.status_code == 200, response.text
+        body = response.json()
+        items = body["result"] if "result" in body else [body]
+        assert len(items) == min(size, body.get("count", 1))
+        if relationship is not None:
+            assert all(item[relationship] is not None for item in items)
+        counts[size] = len(statements)
+
+    assert counts[50] == 1 + other_statements, statements
+    assert counts[2] == counts[50]
@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.replicas import ReplicaSet, read_session_maker
+from src.setup import engine, get_async_read_session, replica_engines
+
+
+def stub_engine(checked_out: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(pool=SimpleNamespace(checkedout=lambda: checked_out))
+
+
+def test_round_robin_cycles_through_the_engines():
+    replicas = ReplicaSet([stub_engine(), stub_engine(), stub_engine()])
+
+    assert [replicas.choose() for _ in range(7)] == [0, 1, 2, 0, 1, 2, 0]
+
+
+def test_least_busy_picks_the_engine_with_fewest_checked_out_connections():
+    replicas = ReplicaSet([stub_engine(3), stub_engine(1), stub_engine(2)], balancing="least_busy")
+
+    assert [replicas.choose() for _ in range(3)] == [1, 1, 1]
+
+
+def test_sessions_are_bound_to_the_chosen_engine():
+    # engines don't connect until a statement runs
+    engines = [create_async_engine(f"postgresql+asyncpg://replica{index}/db") for index in range(2)]
+    replicas = ReplicaSet(engines)
+
+    assert [replicas().bind for _ in range(3)] == [engines[0], engines[1], engines[0]]
+
+
+def test_unknown_balancing_is_rejected():
+    with pytest.raises(ValueError, match="random"):
+        ReplicaSet([stub_engine()], balancing="random")
+
+
+def test_without_replicas_reads_use_the_primary():
+    primary = object()
+
+    with pytest.raises(ValueError):
+        ReplicaSet([])
+    assert read_session_maker([], "round_robin", primary) is primary
+    assert isinstance(read_session_maker([stub_engine()], "round_robin", primary), ReplicaSet)
+
+
+def test_read_session_falls_back_to_the_primary_engine():
+    if replica_engines:
+        pytest.skip("DB_REPLICA_HOSTS is configured")
+
+    async def read_session_bind():
+        sessions = get_async_read_session()
+        session = await sessions.__anext__()
+        await sessions.aclose()
+        return session.bind
+
+    assert asyncio.run(read_session_bind()) is engine
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import update
+
+from benchmarks.dataset import SUPERUSER_ID, Dataset
+from conftest import get, run
+from src.schedules.cache import invalidate_schedule, public_response_cache
+from src.schedules.models import Schedule
+from src.schedules.repositories import ScheduleRepo
+from src.setup import async_session_maker
+from test_week_cache import delete_event, write_event
+
+
+async def rename(schedule_id: int, name: str):
+    """Renames a schedule the way a write handler on this worker would."""
+    async with async_session_maker() as session:
+        await session.execute(update(Schedule).where(Schedule.id == schedule_id).values(name=name))
+        await session.commit()
+    invalidate_schedule(schedule_id)
+
+
+def write_during_fill(monkeypatch, write):
+    """Runs the write once, right after the next request has loaded its schedule and before it fills the cache."""
+    get_by_id = ScheduleRepo.get_by_id
+    pending = [write]
+
+    async def get_by_id_then_write(self, *args, **kwargs):
+        schedule = await get_by_id(self, *args, **kwargs)
+        if pending:
+            await pending.pop()()
+        return schedule
+
+    monkeypatch.setattr(ScheduleRepo, "get_by_id", get_by_id_then_write)
+
+
+@pytest.fixture
+def public_schedule_id(dataset: Dataset) -> int:
+    schedule_id = dataset.public_schedule_ids[0]
+    invalidate_schedule(schedule_id)
+    return schedule_id
+
+
+def test_schedule_written_during_a_fill_is_not_cached(public_schedule_id, monkeypatch):
+    original = run(get(f"/schedules/{public_schedule_id}", SUPERUSER_ID)).json()["name"]
+    invalidate_schedule(public_schedule_id)
+
+    write_during_fill(monkeypatch, lambda: rename(public_schedule_id, "Renamed during a fill"))
+    try:
+        assert run(get(f"/schedules/{public_schedule_id}", SUPERUSER_ID)).json()["name"] == original
+        assert public_response_cache.get((public_schedule_id, "schedule")) is None
+        assert run(get(f"/schedules/{public_schedule_id}", SUPERUSER_ID)).json()["name"] == "Renamed during a fill"
+    finally:
+        run(rename(public_schedule_id, original))
+
+
+def test_events_written_during_a_fill_are_not_cached(public_schedule_id, monkeypatch):
+    path = f"/schedules/{public_schedule_id}/events"
+    count = run(get(path, SUPERUSER_ID)).json()["count"]
+    invalidate_schedule(public_schedule_id)
+
+    event_ids = []
+
+    async def add_event():
+        event_ids.append(await write_event(public_schedule_id))
+        invalidate_schedule(public_schedule_id)
+
+    write_during_fill(monkeypatch, add_event)
+    try:
+        # the schedule, and so the total, was loaded before the write
+        assert run(get(path, SUPERUSER_ID)).json()["count"] == count
+        assert run(get(path, SUPERUSER_ID)).json()["count"] == count + 1
+    finally:
+        for event_id in event_ids:
+            run(delete_event(event_id))
+        invalidate_schedule(public_schedule_id)
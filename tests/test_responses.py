@@ -0,0 +1,35 @@
+"""Bodies rendered straight from ORM objects match what pydantic would render after validating them."""
+import datetime
+
+import pytest
+from pydantic import TypeAdapter
+
+from benchmarks.serialization import build_page
+from src.events.models import Event
+from src.events.schemas import DayOfWeek, ScheduleWeekRead
+from src.fields import parse_fields, sparse_scheme
+from src.responses import paginated_response_content, serialize
+from src.schemas import PaginatedResponseScheme
+from src.subscriptions.schemas import SubscriptionRead
+
+
+def pydantic_body(scheme, content) -> bytes:
+    adapter = TypeAdapter(scheme)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+@pytest.mark.parametrize("fields", [None, "id,subscriber.email,schedule.name,schedule.schedule_type"])
+def test_page_matches_pydantic(fields):
+    scheme = PaginatedResponseScheme[sparse_scheme(SubscriptionRead, parse_fields(fields) if fields else None)]
+    content = paginated_response_content(build_page(), 0, 100)
+
+    assert serialize(scheme, content) == pydantic_body(scheme, content)
+
+
+def test_week_matches_pydantic():
+    now = datetime.datetime(2026, 10, 18, 12, 0, 0, 1234)
+    event = Event(id=1, schedule_id=1, name="Lecture", description=None, day_of_week=DayOfWeek.MONDAY,
+                  start_time=datetime.time(9), end_time=datetime.time(9, 45), created_at=now, updated_at=now)
+    content = {"schedule_id": 1, "days": {day: [event] if day == DayOfWeek.MONDAY else [] for day in DayOfWeek}}
+
+    assert serialize(ScheduleWeekRead, content) == pydantic_body(ScheduleWeekRead, content)
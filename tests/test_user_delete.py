@@ -0,0 +1,46 @@
+from sqlalchemy import insert
+
+from benchmarks.dataset import SUPERUSER_ID, Dataset
+from conftest import get, run, send
+from src.schedules.models import Schedule
+from src.schedules.schemas import Schedule_Type
+from src.setup import async_session_maker
+from src.subscriptions.models import Subscription
+from src.subscriptions.schemas import Subscription_Type
+from src.users.models import User
+
+
+async def create_user_with_schedule(followed_schedule_id: int) -> tuple[int, int]:
+    """A user owning a public schedule and following another one; returns their ids."""
+    async with async_session_maker() as session:
+        user_id = (await session.execute(
+            insert(User).values(email="deleted@test.example", hashed_password="", is_active=True,
+                                is_superuser=False, is_verified=True, name="Deleted", surname="User")
+            .returning(User.id)
+        )).scalar_one()
+        schedule_id = (await session.execute(
+            insert(Schedule).values(name="Deleted schedule", description="", owner_id=user_id,
+                                    schedule_type=Schedule_Type.PUBLIC)
+            .returning(Schedule.id)
+        )).scalar_one()
+        await session.execute(insert(Subscription).values([
+            {"subscriber_id": user_id, "schedule_id": schedule_id, "subscription_type": Subscription_Type.OWNER},
+            {"subscriber_id": user_id, "schedule_id": followed_schedule_id,
+             "subscription_type": Subscription_Type.FOLLOWER},
+        ]))
+        await session.commit()
+    return user_id, schedule_id
+
+
+def test_deleting_a_user_invalidates_the_schedules_it_touched(dataset: Dataset):
+    followed_schedule_id = dataset.public_schedule_ids[0]
+    user_id, owned_schedule_id = run(create_user_with_schedule(followed_schedule_id))
+
+    # both public schedules land in the response cache
+    assert run(get(f"/schedules/{owned_schedule_id}", SUPERUSER_ID)).status_code == 200
+    subscribers = run(get(f"/schedules/{followed_schedule_id}", SUPERUSER_ID)).json()["subscriber_count"]
+
+    assert run(send("DELETE", f"/users/{user_id}", SUPERUSER_ID)).status_code == 200
+
+    assert run(get(f"/schedules/{owned_schedule_id}", SUPERUSER_ID)).status_code == 404
+    assert run(get(f"/schedules/{followed_schedule_id}", SUPERUSER_ID)).json()["subscriber_count"] == subscribers - 1
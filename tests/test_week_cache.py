@@ -0,0 +1,48 @@
+import datetime
+
+from sqlalchemy import delete, insert
+
+from benchmarks.dataset import Dataset
+from conftest import get, run
+from src.events.models import Event
+from src.events.schemas import DayOfWeek
+from src.setup import async_session_maker
+
+
+async def write_event(schedule_id: int) -> int:
+    """Inserts an event the way another worker would: without invalidating this process's caches."""
+    async with async_session_maker() as session:
+        event_id = (await session.execute(
+            insert(Event).values(schedule_id=schedule_id, name="Late lecture", description="",
+                                 day_of_week=DayOfWeek.SUNDAY, start_time=datetime.time(22),
+                                 end_time=datetime.time(23))
+            .returning(Event.id)
+        )).scalar_one()
+        await session.commit()
+    return event_id
+
+
+async def delete_event(event_id: int):
+    async with async_session_maker() as session:
+        await session.execute(delete(Event).where(Event.id == event_id))
+        await session.commit()
+
+
+def test_week_is_rebuilt_after_a_write_elsewhere(dataset: Dataset):
+    schedule_id = 1
+    owner_id = dataset.owner_of(schedule_id)
+
+    first = run(get(f"/schedules/{schedule_id}/week", owner_id))
+    assert run(get(f"/schedules/{schedule_id}/week", owner_id)).headers["etag"] == first.headers["etag"]
+
+    event_id = run(write_event(schedule_id))
+    try:
+        second = run(get(f"/schedules/{schedule_id}/week", owner_id, {"If-None-Match": first.headers["etag"]}))
+    finally:
+        run(delete_event(event_id))
+    third = run(get(f"/schedules/{schedule_id}/week", owner_id))
+
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert event_id in [event["id"] for event in second.json()["days"]["sunday"]]
+    assert event_id not in [event["id"] for event in third.json()["days"]["sunday"]]